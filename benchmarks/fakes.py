@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import os
+import time
+
+from aiohttp import web
+
+_ids = itertools.count(1000)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str = 'bench'):
+        self.id = user_id
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, channel: 'FakeChannel' = None, content: str = '', author: FakeUser = None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.author = author
+        self.replies: list[str] = []
+        self.edits: list[str] = []
+        self.replied = asyncio.Event()
+
+    async def reply(self, content: str = None, **kwargs):
+        self.replies.append(content)
+        self.replied.set()
+        return FakeMessage(self.channel, content)
+
+    async def edit(self, content: str = None, **kwargs):
+        self.edits.append(content)
+        return self
+
+    async def edit_original_response(self, content: str = None, **kwargs):
+        return await self.edit(content=content, **kwargs)
+
+
+class FakeWebhook:
+    def __init__(self, url: str):
+        self.url = url
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeChannel:
+    def __init__(self, http: 'FakeHttpServer'):
+        self.id = next(_ids)
+        self.http = http
+        self.sent: list[str] = []
+
+    async def send(self, content: str = None, **kwargs):
+        self.sent.append(content)
+        return FakeMessage(self, content)
+
+    async def create_webhook(self, name: str, **kwargs):
+        return FakeWebhook(f'{self.http.url}/webhooks/{self.id}/token')
+
+
+class FakeApplicationContext:
+    """Just enough of `discord.ApplicationContext` for the cogs' command callbacks."""
+
+    def __init__(self, bot, channel: FakeChannel, user: FakeUser, selected_options: list[dict] = None):
+        self.bot = bot
+        self.channel = channel
+        self.user = self.author = user
+        self.selected_options = selected_options or []
+        self.responses: list[FakeMessage] = []
+
+    async def respond(self, content: str = None, **kwargs):
+        message = FakeMessage(self.channel, content)
+        self.responses.append(message)
+        return message
+
+    async def send_followup(self, content: str = None, **kwargs):
+        return await self.respond(content, **kwargs)
+
+    async def send(self, content: str = None, **kwargs):
+        return await self.respond(content, **kwargs)
+
+    async def defer(self, **kwargs):
+        pass
+
+
+class FakeAutocompleteContext:
+    def __init__(self, bot, value: str):
+        self.bot = bot
+        self.value = value
+
+
+class FakeHttpServer:
+    """
+    In-process HTTP server standing in for discord's webhook endpoint and the file server.
+
+    Webhook posts are recorded with the time they arrived, optionally answering with discord-like
+    rate-limit headers. Files put in `files_dir` are served (with Range support) under `/files/`.
+    """
+
+    def __init__(self, files_dir: str, rate_limit: tuple[int, float] = None):
+        self.files_dir = files_dir
+        self.rate_limit = rate_limit  # (requests, per seconds)
+        self.webhook_posts: list[tuple[float, str]] = []
+        self.url = ''
+
+        self._bucket_reset = 0.0
+        self._bucket_remaining = 0
+        self._runner: web.AppRunner | None = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/webhooks/{channel}/{token}', self._webhook)
+        app.router.add_get('/files/{name}', self._file)
+        app.router.add_get('/', self._index)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        self.url = f'http://127.0.0.1:{port}'
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _index(self, request: web.Request):
+        return web.Response(text='ok')
+
+    async def _webhook(self, request: web.Request):
+        headers = {}
+
+        if self.rate_limit is not None:
+            now = time.monotonic()
+            if now >= self._bucket_reset:
+                self._bucket_reset = now + self.rate_limit[1]
+                self._bucket_remaining = self.rate_limit[0]
+
+            if self._bucket_remaining <= 0:
+                return web.json_response({'retry_after': self._bucket_reset - now}, status=429)
+
+            self._bucket_remaining -= 1
+            headers = {
+                'X-RateLimit-Remaining': str(self._bucket_remaining),
+                'X-RateLimit-Reset-After': f'{self._bucket_reset - now:.3f}',
+            }
+
+        data = await request.json()
+        self.webhook_posts.append((time.monotonic(), data.get('content', '')))
+
+        return web.Response(status=204, headers=headers)
+
+    async def _file(self, request: web.Request):
+        path = os.path.join(self.files_dir, os.path.basename(request.match_info['name']))
+
+        if not os.path.exists(path):
+            raise web.HTTPNotFound()
+
+        return web.FileResponse(path)
@@ -0,0 +1,342 @@
+"""
+End-to-end benchmarks of the cogs, against in-process fakes of docker, RCON, discord and the file server.
+
+Run from the repository root:
+    python -m benchmarks.run --output bench_output.json
+
+Every scenario reports latency percentiles (milliseconds) and throughput as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import discord
+from tortoise import Tortoise
+
+import config
+import src
+from src import SubclassedBot, archive
+from src.docker_backend import FakeDockerBackend
+from src.http_client import http_client
+from src.models import Preset
+from src.rcon import FakeRconServer
+from cogs import basic, minecraft, presets, backups, logs
+from .fakes import (
+    FakeApplicationContext, FakeAutocompleteContext, FakeChannel, FakeHttpServer, FakeMessage, FakeUser
+)
+
+USER = FakeUser(1)
+VERSION = '1.19.4'
+_LINE = re.compile(r'^bench-line (\d+) ')
+_SKIPPED = re.compile(r'^\.\.\. (\d+) line\(s\) skipped')
+
+
+def summarize(latencies: list[float], elapsed: float = None, **extra) -> dict:
+    """Latencies in seconds in, milliseconds out."""
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000
+
+    result = {
+        'count': len(ordered),
+        'p50_ms': round(percentile(0.50), 3),
+        'p99_ms': round(percentile(0.99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+    }
+
+    if elapsed:
+        result['per_second'] = round(len(ordered) / elapsed, 2)
+
+    result.update(extra)
+    return result
+
+
+class Harness:
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.workdir = workdir
+
+        self.http: FakeHttpServer | None = None
+        self.rcon: FakeRconServer | None = None
+        self.bot: SubclassedBot | None = None
+
+    async def __aenter__(self):
+        for name in ('volumes', 'public', 'backups', 'manifests', 'files', 'shared', 'logs'):
+            os.makedirs(f'{self.workdir}/{name}', exist_ok=True)
+
+        config.DOCKER_VOLUME_PATH = f'{self.workdir}/volumes'
+        config.HTTP_SERVER_PATH = f'{self.workdir}/public'
+        config.BACKUP_PATH = f'{self.workdir}/backups'
+        config.MANIFEST_PATH = f'{self.workdir}/manifests'
+        config.SHARED_CACHE_PATH = f'{self.workdir}/shared'
+        config.LOG_ARCHIVE_PATH = f'{self.workdir}/logs'
+        config.WHITELIST = [USER.id]
+        config.LOG_FLUSH_INTERVAL = self.args.log_flush_interval
+        # Benchmarked servers are fakes, they shouldn't wait for room on the host.
+        config.HOST_MEMORY_BUDGET = 1024 ** 3
+        config.HOST_CPU_BUDGET = 1024.0
+        config.METRICS_PORT = None
+
+        rate_limit = (5, 2.0) if self.args.rate_limit else None
+        self.http = FakeHttpServer(f'{self.workdir}/files', rate_limit=rate_limit)
+        await self.http.start()
+
+        self.rcon = FakeRconServer(None)
+        rcon_port = await self.rcon.start()
+
+        src.docker_backend = FakeDockerBackend(host_ports={f'{config.RCON_PORT}/tcp': rcon_port})
+
+        await Tortoise.init(db_url='sqlite://:memory:', modules={'models': ['src.models']})
+        await Tortoise.generate_schemas()
+
+        self.bot = SubclassedBot(intents=discord.Intents.default())
+        for cog in (basic, minecraft, presets, backups, logs):
+            cog.setup(self.bot)
+
+        return self
+
+    async def __aexit__(self, *exc):
+        for session in self.bot.servers:
+            await self.stop(session.name)
+
+        await http_client.close()
+        archive.shutdown_pool()
+        await self.rcon.close()
+        await self.http.close()
+        await Tortoise.close_connections()
+
+    @property
+    def minecraft(self) -> minecraft.Minecraft:
+        return self.bot.get_cog('Minecraft')
+
+    def context(self, channel: FakeChannel = None, selected_options: list[dict] = None) -> FakeApplicationContext:
+        return FakeApplicationContext(self.bot, channel or FakeChannel(self.http), USER, selected_options)
+
+    async def create_preset(self, name: str, port: int) -> Preset:
+        preset = await Preset.create(name=name, version=VERSION, port=port)
+        self.bot.preset_names.add(name)
+        return preset
+
+    async def start(self, name: str, channel: FakeChannel = None) -> FakeApplicationContext:
+        ctx = self.context(channel)
+        await minecraft.Minecraft.start_server.callback(self.minecraft, ctx, name)
+        return ctx
+
+    async def stop(self, name: str):
+        session = self.bot.servers.get(name)
+        await session.preset.shutdown_logic(0)
+        self.bot.servers.remove(name)
+
+
+async def bench_start(h: Harness) -> dict:
+    starts, stops = [], []
+
+    for i in range(h.args.servers):
+        await h.create_preset(f'start{i}', 30000 + i)
+
+    began = time.perf_counter()
+    for i in range(h.args.servers):
+        t = time.perf_counter()
+        await h.start(f'start{i}')
+        starts.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - began
+
+    for i in range(h.args.servers):
+        t = time.perf_counter()
+        await h.stop(f'start{i}')
+        stops.append(time.perf_counter() - t)
+
+    return {'start': summarize(starts, elapsed), 'stop': summarize(stops)}
+
+
+async def bench_console(h: Harness) -> dict:
+    await h.create_preset('console', 31000)
+    channel = FakeChannel(h.http)
+    await h.start('console', channel)
+
+    async def send(i: int) -> float:
+        message = FakeMessage(channel, f'{config.CONSOLE_PREFIX}say hello {i}', USER)
+        t = time.perf_counter()
+        await h.minecraft.on_message(message)
+        return time.perf_counter() - t
+
+    began = time.perf_counter()
+    latencies = await asyncio.gather(*(send(i) for i in range(h.args.commands)))
+    elapsed = time.perf_counter() - began
+
+    await h.stop('console')
+
+    return {'console_commands': summarize(list(latencies), elapsed, received=len(h.rcon.commands))}
+
+
+async def bench_log_flood(h: Harness) -> dict:
+    await h.create_preset('logs', 32000)
+    await h.start('logs')
+
+    container = h.bot.servers.get('logs').container
+    posts_before = len(h.http.webhook_posts)
+    emitted: dict[int, float] = {}
+
+    began = time.perf_counter()
+    for i in range(h.args.log_lines):
+        emitted[i] = time.monotonic()
+        container.emit(f'bench-line {i} [Server thread/INFO]: Preparing spawn area: {i % 100}%')
+
+        if i % 500 == 0:
+            await asyncio.sleep(0)
+
+    delivered: dict[int, float] = {}
+    skipped = 0
+    seen = posts_before
+    deadline = time.monotonic() + h.args.timeout
+
+    while len(delivered) + skipped < len(emitted) and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+        for received_at, content in h.http.webhook_posts[seen:]:
+            for line in content.removeprefix('```md\n').removesuffix('```').split('\n'):
+                if match := _LINE.match(line):
+                    delivered.setdefault(int(match.group(1)), received_at)
+                elif match := _SKIPPED.match(line):
+                    skipped += int(match.group(1))
+
+        seen = len(h.http.webhook_posts)
+
+    elapsed = time.perf_counter() - began
+    messages = len(h.http.webhook_posts) - posts_before
+
+    await h.stop('logs')
+
+    return {'log_flood': summarize(
+        [delivered[i] - emitted[i] for i in delivered], elapsed,
+        emitted=len(emitted), delivered=len(delivered), skipped=skipped, webhook_messages=messages,
+        lines_per_message=round(len(delivered) / max(messages, 1), 2),
+        messages_per_second=round(messages / elapsed, 2),
+    )}
+
+
+async def bench_autocomplete(h: Harness) -> dict:
+    h.bot.preset_names.build(f'preset{i:05d}' for i in range(h.args.presets))
+    prefixes = ['', 'p', 'preset0', 'preset01', 'preset012', 'preset0123', 'missing']
+
+    latencies = []
+    began = time.perf_counter()
+    for i in range(h.args.queries):
+        ctx = FakeAutocompleteContext(h.bot, prefixes[i % len(prefixes)])
+        t = time.perf_counter()
+        await presets.names(ctx)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - began
+
+    return {'autocomplete': summarize(latencies, elapsed, presets=h.args.presets)}
+
+
+async def bench_help(h: Harness) -> dict:
+    latencies = []
+    for _ in range(h.args.queries // 10 or 1):
+        t = time.perf_counter()
+        h.bot.help_command()
+        latencies.append(time.perf_counter() - t)
+
+    return {'help': summarize(latencies)}
+
+
+def _make_world(root: str, megabytes: int):
+    for dimension in config.DIMENSIONS:
+        region = f'{root}/{dimension}/region'
+        os.makedirs(region, exist_ok=True)
+
+        with open(f'{root}/{dimension}/level.dat', 'wb') as file:
+            file.write(os.urandom(4096))
+
+        for i in range(max(megabytes // len(config.DIMENSIONS), 1)):
+            with open(f'{region}/r.{i}.0.mca', 'wb') as file:
+                # Half random, half zeros, roughly as compressible as real region files.
+                file.write(os.urandom(512 * 1024) + bytes(512 * 1024))
+
+
+async def bench_world(h: Harness) -> dict:
+    await h.create_preset('world', 33000)
+    volume = f'{config.DOCKER_VOLUME_PATH}/world'
+    _make_world(volume, h.args.world_mb)
+
+    results = {}
+
+    for codec in ('store', 'deflate'):
+        ctx = h.context()
+        t = time.perf_counter()
+        await minecraft.Minecraft.download_world.callback(h.minecraft, ctx, 'world', codec, 1, None)
+        elapsed = time.perf_counter() - t
+        results[f'world_download_{codec}'] = summarize(
+            [elapsed], mb_per_second=round(h.args.world_mb / elapsed, 2)
+        )
+
+    shutil.make_archive(f'{h.http.files_dir}/upload', 'zip', volume)
+
+    ctx = h.context()
+    t = time.perf_counter()
+    await minecraft.Minecraft.upload_world.callback(h.minecraft, ctx, f'{h.http.url}/files/upload.zip', 'world')
+    elapsed = time.perf_counter() - t
+    results['world_upload'] = summarize([elapsed], mb_per_second=round(h.args.world_mb / elapsed, 2))
+
+    return results
+
+
+SCENARIOS = {
+    'start': bench_start,
+    'console': bench_console,
+    'logs': bench_log_flood,
+    'autocomplete': bench_autocomplete,
+    'help': bench_help,
+    'world': bench_world,
+}
+
+
+async def main(args) -> dict:
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='mc-bench-') as workdir:
+        async with Harness(args, workdir) as h:
+            for name in args.scenarios.split(','):
+                print(f'⏱ Running {name}...', file=sys.stderr)
+                results.update(await SCENARIOS[name](h))
+
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma separated: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--output', help='Write JSON results here instead of stdout')
+    parser.add_argument('--servers', type=int, default=20, help='Servers started in the start scenario')
+    parser.add_argument('--commands', type=int, default=500, help='Console commands sent in one burst')
+    parser.add_argument('--log-lines', type=int, default=20000, help='Log lines in the flood')
+    parser.add_argument('--log-flush-interval', type=float, default=config.LOG_FLUSH_INTERVAL)
+    parser.add_argument('--presets', type=int, default=5000, help='Preset names in the autocomplete index')
+    parser.add_argument('--queries', type=int, default=2000, help='Autocomplete queries')
+    parser.add_argument('--world-mb', type=int, default=64, help='Size of the generated world')
+    parser.add_argument('--rate-limit', action='store_true', help='Answer webhooks with discord-like rate limits')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Max seconds to wait for the log flood')
+
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    output = json.dumps(asyncio.run(main(arguments)), indent=2)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,115 @@
+import asyncio
+
+import discord
+from discord import SlashCommandGroup
+from discord.ext.commands import cooldown, BucketType
+
+from src import SubclassedBot
+from src.backup import BackupStore
+from src.models import Preset
+from .presets import names
+
+
+def _format_size(size: int) -> str:
+    return f'{size / 1024 ** 2:.1f} MB'
+
+
+class Backups(discord.Cog):
+    def __init__(self, bot):
+        self.bot: SubclassedBot = bot
+        self.store = BackupStore()
+        self.lock = asyncio.Lock()  # Snapshots share chunks, so only one job touches the store at a time.
+
+    backup = SlashCommandGroup(name='backup', description='Deduplicated world backups.')
+
+    @cooldown(1, 30, BucketType.default)
+    @backup.command(name='create', description='Snapshot world(s) of a preset.')
+    async def backup_create(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+    ):
+        name = preset.lower()
+
+        if not await Preset.get_cached(name):
+            return await ctx.respond(f"❌ There is no preset with name `{name}`", ephemeral=True)
+
+        await ctx.defer()
+
+        session = self.bot.servers.get(name)
+
+        async with self.lock:
+            if session is not None and session.container is not None:
+                # Make sure region files are complete and stay that way while they're read.
+                await session.preset.send_command("save-off")
+                await session.preset.send_command("save-all flush")
+
+            try:
+                manifest = await asyncio.to_thread(self.store.create, name)
+            finally:
+                if session is not None and session.container is not None:
+                    await session.preset.send_command("save-on")
+
+        await ctx.respond(
+            f"✅ Created snapshot `{manifest['id']}` of `{name}` "
+            f"({len(manifest['files'])} files, {_format_size(manifest['size'])}, "
+            f"{_format_size(manifest['new_bytes'])} new)"
+        )
+
+    @backup.command(name='list', description='List snapshots of a preset.')
+    async def backup_list(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+    ):
+        name = preset.lower()
+        snapshots = await asyncio.to_thread(self.store.snapshots, name)
+
+        if not snapshots:
+            return await ctx.respond(f"ℹ There are no snapshots of `{name}` yet.", ephemeral=True)
+
+        content = ''.join(
+            f"`{x['id']}` » {_format_size(x['size'])} ({_format_size(x['new_bytes'])} new)\n"
+            for x in snapshots[:25]
+        )
+
+        await ctx.respond(f"**Snapshots of `{name}`:**\n{content}")
+
+    @cooldown(1, 30, BucketType.default)
+    @backup.command(name='restore', description='Restore world(s) from a snapshot (it will replace current ones!)')
+    async def backup_restore(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            snapshot: discord.Option(str, description='Snapshot ID, see /backup list'),
+    ):
+        name = preset.lower()
+
+        if name in self.bot.servers:
+            return await ctx.respond("❌ Couldn't restore world(s), server is running.", ephemeral=True)
+
+        await ctx.defer()
+
+        async with self.lock:
+            restored = await asyncio.to_thread(self.store.restore, name, snapshot)
+
+        if restored is None:
+            return await ctx.respond(f"❌ There is no snapshot `{snapshot}` of `{name}`", ephemeral=True)
+
+        await ctx.respond(f"✅ Restored `{name}` from `{snapshot}`, files restored: `{restored}`")
+
+    @cooldown(1, 30, BucketType.default)
+    @backup.command(name='prune', description='Delete old snapshots of a preset.')
+    async def backup_prune(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            keep: discord.Option(int, min_value=0, description='How many of the newest snapshots to keep'),
+    ):
+        name = preset.lower()
+        await ctx.defer()
+
+        async with self.lock:
+            removed, freed = await asyncio.to_thread(self.store.prune, name, keep)
+
+        await ctx.respond(f"✅ Deleted `{removed}` snapshot(s) of `{name}`, freed {_format_size(freed)}")
+
+
+def setup(bot):
+    bot.add_cog(Backups(bot))
@@ -0,0 +1,167 @@
+import asyncio
+import re
+import time
+
+import discord
+from discord import SlashCommandGroup
+
+from src import SubclassedBot
+from src.log_archive import LogArchive
+from src.log_events import CATEGORIES
+from src.models import Preset, LogRule
+from .presets import names
+
+_ACTIONS = ['drop', 'sample', 'highlight']
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_DURATION = re.compile(r'^(\d+)([smhd])$')
+
+
+def _code_block(lines: list[str]) -> str:
+    """The newest lines that fit in one message."""
+    kept = []
+    size = 0
+
+    for line in reversed(lines):
+        size += len(line) + 1
+        if size > 1900:
+            break
+
+        kept.append(line)
+
+    return '```md\n' + '\n'.join(reversed(kept)) + '```'
+
+
+class Logs(discord.Cog):
+    def __init__(self, bot):
+        self.bot: SubclassedBot = bot
+
+    logs = SlashCommandGroup(name='logs', description='Console logs of servers.')
+    rules = logs.create_subgroup(name='rules', description='Choose which console lines are forwarded to discord.')
+
+    @staticmethod
+    async def archive(name: str) -> LogArchive | None:
+        preset = await Preset.get_cached(name)
+
+        if preset is None:
+            return None
+
+        # A running server's archive also has the lines that aren't written to disk yet.
+        return preset.log_archive or LogArchive(name)
+
+    @logs.command(name='tail', description='Last console lines of a server, also works after it stopped.')
+    async def tail(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            lines: discord.Option(int, min_value=1, max_value=200, required=False, description='How many') = 30,
+    ):
+        archive = await self.archive(preset.lower())
+        if archive is None:
+            return await ctx.respond(f"❌ There is no preset with name `{preset.lower()}`", ephemeral=True)
+
+        found = await asyncio.to_thread(archive.tail, lines)
+
+        if not found:
+            return await ctx.respond(f"ℹ There are no logs of `{preset.lower()}` yet.", ephemeral=True)
+
+        await ctx.respond(_code_block([line for _, line in found]))
+
+    @logs.command(name='search', description='Search archived console logs of a server.')
+    async def search(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            pattern: discord.Option(str, max_length=200, description='Regular expression'),
+            since: discord.Option(
+                str, required=False, description='Only lines newer than this, like 30m, 6h or 2d'
+            ) = None,
+    ):
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            return await ctx.respond(f"❌ Invalid regular expression: `{e}`", ephemeral=True)
+
+        after = None
+        if since is not None:
+            if not (match := _DURATION.match(since.strip().lower())):
+                return await ctx.respond("❌ `since` should look like `30m`, `6h` or `2d`.", ephemeral=True)
+
+            after = time.time() - int(match.group(1)) * _UNITS[match.group(2)]
+
+        archive = await self.archive(preset.lower())
+        if archive is None:
+            return await ctx.respond(f"❌ There is no preset with name `{preset.lower()}`", ephemeral=True)
+
+        await ctx.defer()
+        found = await asyncio.to_thread(archive.search, regex, after)
+
+        if not found:
+            return await ctx.respond(f"ℹ Nothing matched `{pattern}`.")
+
+        await ctx.respond(_code_block([
+            f"{time.strftime('%m-%d %H:%M:%S', time.localtime(timestamp))} {line}" for timestamp, line in found
+        ]))
+
+    @staticmethod
+    async def reload_rules(name: str):
+        # Running servers pick the change up right away.
+        preset = await Preset.get_cached(name)
+
+        if preset is not None and preset.running:
+            await preset.load_log_rules()
+
+    @rules.command(name='set', description='Drop, sample or highlight a category of console lines.')
+    async def rules_set(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            category: discord.Option(str, choices=CATEGORIES, description='Kind of console line'),
+            action: discord.Option(str, choices=_ACTIONS, description='What to do with those lines'),
+            every: discord.Option(
+                int, min_value=2, max_value=1000, required=False, description="With 'sample', forward 1 of this many."
+            ) = 10,
+    ):
+        name = preset.lower()
+
+        if not await Preset.get_cached(name):
+            return await ctx.respond(f"❌ There is no preset with name `{name}`", ephemeral=True)
+
+        await LogRule.update_or_create(
+            preset=name, category=category, defaults={'action': action, 'every': every if action == 'sample' else 1}
+        )
+        await self.reload_rules(name)
+
+        outcome = {'drop': 'dropped', 'sample': f'sampled (1 of {every})', 'highlight': 'highlighted'}[action]
+        await ctx.respond(f"✅ `{category}` lines of `{name}` will be {outcome}.")
+
+    @rules.command(name='remove', description='Forward a category of console lines as they are again.')
+    async def rules_remove(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+            category: discord.Option(str, choices=CATEGORIES, description='Kind of console line'),
+    ):
+        name = preset.lower()
+        removed = await LogRule.filter(preset=name, category=category).delete()
+
+        if not removed:
+            return await ctx.respond(f"❌ `{name}` has no rule for `{category}`", ephemeral=True)
+
+        await self.reload_rules(name)
+        await ctx.respond(f"✅ Removed the `{category}` rule of `{name}`.")
+
+    @rules.command(name='list', description='Show console line rules of a preset.')
+    async def rules_list(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(str, max_length=20, autocomplete=names, description='Name of the preset'),
+    ):
+        name = preset.lower()
+        rules = await LogRule.filter(preset=name).order_by('category')
+
+        if not rules:
+            return await ctx.respond(f"ℹ `{name}` forwards every console line.", ephemeral=True)
+
+        content = ''.join(
+            f"`{x.category}` » {x.action}{f' (1 of {x.every})' if x.action == 'sample' else ''}\n" for x in rules
+        )
+        await ctx.respond(f"**Console rules of `{name}`:**\n{content}")
+
+
+def setup(bot):
+    bot.add_cog(Logs(bot))
@@ -2,18 +2,24 @@ import asyncio
 import os
 import platform
 import shutil
+import statistics
 import uuid
-from shutil import make_archive
 
 import aiofiles
-import aiohttp
 import discord
 from discord import SlashCommandGroup
 from discord.ext.commands import cooldown, BucketType
 
 import config
-from src import SubclassedBot, utils
-from src.models import Preset
+from src import SubclassedBot, Versions, utils, archive, manifest
+from src.images import image_name
+from src.download import download_file
+from src.exceptions import AdmissionCancelled, AdmissionRejected, DownloadFailed, RconError, RconUnavailable
+from src.server_registry import ServerSession
+from src.models import Preset, ResourceSample, StartupRecord
+from src.heap_sampler import HeapSampler
+from src.idle import IdleManager
+from src.stats import ResourceSampler, sparkline
 from .presets import names
 
 versions = [
@@ -22,39 +28,73 @@ versions = [
 ]
 
 
+async def running_names(ctx: discord.AutocompleteContext):
+    return [discord.OptionChoice(x.name) for x in ctx.bot.servers if x.name.startswith(ctx.value)]
+
+
 class Minecraft(discord.Cog):
     def __init__(self, bot):
         self.bot: SubclassedBot = bot
-        self.running = False
-        self.preset = None
-        self.container = None
-        self.console_channel = None
+        self.sampler = ResourceSampler(bot)
+        self.idle = IdleManager(bot)
+        self.heap_sampler = HeapSampler(bot)
 
     world = SlashCommandGroup(name='world', description="Commands to work with server world(s)")
 
+    async def stop_session(self, session: ServerSession):
+        # A start still waiting for room has nothing to shut down, its wait ends with AdmissionCancelled.
+        self.bot.admission.cancel(session.name)
+
+        if session.proxy is not None:
+            await session.proxy.close()
+            session.proxy = None
+
+        try:
+            # Sleeping and queued servers have no running container, there's nothing to wait for.
+            await session.preset.shutdown_logic(15.0 if session.preset.running else 0)
+        finally:
+            self.bot.servers.remove(session.name)
+            self.bot.admission.release(session.name)
+
+    def cog_unload(self):
+        self.sampler.stop()
+        self.idle.stop()
+        self.heap_sampler.stop()
+
+    @discord.Cog.listener()
+    async def on_ready(self):
+        self.sampler.start()
+        self.idle.start()
+        self.heap_sampler.start()
+
     @discord.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if message.channel.id != self.console_channel:
+        session = self.bot.servers.by_channel(message.channel.id)
+
+        if session is None or session.container is None:
             return
 
         if not message.content.startswith(config.CONSOLE_PREFIX) or message.author.id not in config.WHITELIST:
             return
 
         cmd = message.content.removeprefix(config.CONSOLE_PREFIX).strip()
-        cmd = cmd.translate(cmd.maketrans(config.ESCAPED_CHARACTERS))
 
-        print(f'{config.CONSOLE_PREFIX} {cmd}  ({message.author} [{message.author.id}])')
-        response = self.container.exec_run(["mc-send-to-console", f"{cmd}"])
+        print(f'{config.CONSOLE_PREFIX} {cmd}  [{session.name}] ({message.author} [{message.author.id}])')
+        try:
+            pretty_response = (await session.preset.send_command(cmd)).strip()
+        except RconUnavailable as e:
+            return await message.reply(f'❌ {e}')
+        except RconError as e:
+            # The command was sent but didn't answer, "stop" usually drops the connection before it does.
+            await message.reply(f'❌ {e}')
+        else:
+            if len(pretty_response) > 1900:
+                pretty_response = pretty_response[:1900] + '…'
 
-        pretty_response = response.output.decode("utf-8")
-        await message.reply(f'Response: `{pretty_response if len(pretty_response) > 0 else "✅"}`')
+            await message.reply(f'Response: ```{pretty_response}```' if pretty_response else 'Response: `✅`')
 
-        if cmd == "stop" and self.running:
-            await self.preset.shutdown_logic()
-            self.running = False
-            self.preset = None
-            self.container = None
-            self.console_channel = None
+        if cmd == "stop" and session.preset.running:
+            await self.stop_session(session)
 
     @cooldown(1, 10, BucketType.default)
     @world.command(name='download', description='Download server world(s).')
@@ -63,14 +103,25 @@ class Minecraft(discord.Cog):
             preset: discord.Option(
                 max_length=20, autocomplete=names, description='Name of a preset you want to download from'
             ),
+            codec: discord.Option(
+                str, choices=archive.available_codecs(), default='deflate',
+                description='store - fastest, biggest | deflate - regular zip | zstd - small and fast, .tar.zst'
+            ),
+            level: discord.Option(
+                int, min_value=0, max_value=22, default=None, description='Compression level (codec dependant)'
+            ),
+            since: discord.Option(
+                str, default=None, description='Download ID of a previous download, to only get what changed since'
+            ),
     ):
-        if self.running:
+        name = preset.lower()
+
+        if name in self.bot.servers:
             return await ctx.respond("❌ Couldn't download world(s), server is running.", ephemeral=True)
 
         await ctx.respond('Working on it...')
 
-        name = preset.lower()
-        preset = await Preset.get_or_none(name=name)
+        preset = await Preset.get_cached(name)
 
         if not preset:
             return await ctx.respond(
@@ -78,18 +129,64 @@ class Minecraft(discord.Cog):
             )
 
         directory = f'{uuid.uuid4()}'
+        volume = f"{config.DOCKER_VOLUME_PATH}/{preset.name}"
+        destination = f'{config.HTTP_SERVER_PATH}/{directory}'
+
+        if since is not None:
+            old_manifest = await asyncio.to_thread(manifest.load, preset.name, since)
+
+            if old_manifest is None:
+                return await ctx.send_followup(f"❌ There is no download `{since}` of `{preset.name}`.")
+
+            progress_message = await ctx.send_followup(f'🔍 Looking for changes since `{since}`...')
+
+            new_manifest = await asyncio.to_thread(
+                manifest.build_manifest, volume, config.DIMENSIONS, await asyncio.to_thread(
+                    manifest.load_latest, preset.name
+                )
+            )
+            changed, deleted = manifest.diff(old_manifest, new_manifest)
+
+            await progress_message.edit(content=f'📦 Archiving `{len(changed)}` changed file(s) with `{codec}`...')
+
+            _, total_size = await archive.archive_changes(volume, changed, f'{destination}/changes', codec, level)
 
-        for world in config.DIMENSIONS:
-            start_path = f"{config.DOCKER_VOLUME_PATH}/{preset.name}/{world}"
-            end_path = f'{config.HTTP_SERVER_PATH}/{directory}/{world}'
+            async with aiofiles.open(f'{destination}/deleted.txt', 'w') as file:
+                await file.write(''.join(f'{x}\n' for x in deleted))
 
-            if not os.path.exists(start_path):
+            await asyncio.to_thread(manifest.save, preset.name, directory, new_manifest)
+
+            return await progress_message.edit(
+                content=f'**Result:** http://{os.getenv("IP")}:6969/{directory}/ (`{total_size / 1024 ** 2:.1f} MB`, '
+                        f'`{len(changed)}` changed, `{len(deleted)}` deleted)\n'
+                        f'Download ID: `{directory}`'
+            )
+
+        progress_message = await ctx.send_followup(f'📦 Archiving with `{codec}`...')
+
+        async def on_progress(world: str, done: int, total: int):
+            await progress_message.edit(content=f'📦 Archiving with `{codec}`... `{world}` done ({done}/{total})')
+
+        async def record_manifest():
+            previous = await asyncio.to_thread(manifest.load_latest, preset.name)
+            new = await asyncio.to_thread(manifest.build_manifest, volume, config.DIMENSIONS, previous)
+            await asyncio.to_thread(manifest.save, preset.name, directory, new)
+
+        results, _ = await asyncio.gather(
+            archive.archive_worlds(volume, destination, config.DIMENSIONS, codec, level, on_progress),
+            record_manifest()
+        )
+
+        for world, result in results.items():
+            if result is None:
                 await ctx.channel.send(f"❌ There is no `{world}` on this version.")
-                continue
 
-            make_archive(end_path, 'zip', start_path)
+        total_size = sum(x[1] for x in results.values() if x is not None)
 
-        await ctx.send_followup(f'**Result:** http://{os.getenv("IP")}:6969/{directory}/')
+        await progress_message.edit(
+            content=f'**Result:** http://{os.getenv("IP")}:6969/{directory}/ (`{total_size / 1024 ** 2:.1f} MB`)\n'
+                    f'Download ID: `{directory}` (use it as `since` to download only what changed)'
+        )
 
     # TODO: Should be refactored.
     @cooldown(1, 15, BucketType.default)
@@ -101,11 +198,12 @@ class Minecraft(discord.Cog):
                 max_length=20, autocomplete=names, description='Name of a preset you want to download from'
             ),
     ):
-        if self.running:
+        name = preset.lower()
+
+        if name in self.bot.servers:
             return await ctx.respond("❌ Couldn't upload world, server is running.", ephemeral=True)
 
-        name = preset.lower()
-        preset = await Preset.get_or_none(name=name)
+        preset = await Preset.get_cached(name)
 
         if not preset:
             return await ctx.respond(
@@ -130,99 +228,322 @@ class Minecraft(discord.Cog):
         archive_name = f'{uuid.uuid4()}{archive_types[archive_type_index]}'
         archive_path = f'{utils.ensure_directory_exists(f"{os.getcwd()}/temp")}/{archive_name}'.replace("\\", "/")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return await ctx.respond(
-                        f'❌ Got {response.status}, make sure you provide a valid url.', ephemeral=True
-                    )
+        message_response = await ctx.send_followup("🚀 Downloading file")
+
+        async def on_progress(written: int, total: int | None):
+            of_total = f' / {total / 1024 ** 2:.1f}' if total else ''
+            await message_response.edit(content=f"🚀 Downloading file... `{written / 1024 ** 2:.1f}{of_total} MB`")
+
+        temp_dir = None
 
-                message_response = await ctx.send_followup("🚀 Downloading file")
-                async with aiofiles.open(archive_path, 'wb') as file:
-                    await file.write(await response.read())
-                    await file.close()
-                    await message_response.edit(content="ℹ Download complete, unpacking...")
+        try:
+            try:
+                await download_file(self.bot.http_client.session, url, archive_path, on_progress=on_progress)
+            except DownloadFailed as e:
+                return await message_response.edit(content=f'❌ {e}')
 
-        temp_dir = f'{config.DOCKER_VOLUME_PATH}/{preset.name}/Temp'.replace("\\", "/")
-        temp_dir = utils.ensure_directory_exists(temp_dir)
+            await message_response.edit(content="ℹ Download complete, unpacking...")
 
-        shutil.unpack_archive(archive_path, temp_dir)
-        is_world_in_unpacked = os.path.exists(f'{temp_dir}/world')
-        is_world_nether_unpacked = os.path.exists(f'{temp_dir}/world_nether')
-        is_world_the_end_unpacked = os.path.exists(f'{temp_dir}/world_the_end')
+            temp_dir = f'{config.DOCKER_VOLUME_PATH}/{preset.name}/Temp'.replace("\\", "/")
+            temp_dir = utils.ensure_directory_exists(temp_dir)
 
-        def delete_and_move(world_name):
-            world_path = f'{config.DOCKER_VOLUME_PATH}/{preset.name}/{world_name}'
-            if os.path.exists(world_path):
-                shutil.rmtree(world_path)
-            shutil.move(f'{temp_dir}/{world_name}', world_path)
-            if platform.system() == "Linux":
-                os.system(f"chown -R 1000:1000 {world_path}")
+            await asyncio.to_thread(shutil.unpack_archive, archive_path, temp_dir)
+            is_world_in_unpacked = os.path.exists(f'{temp_dir}/world')
+            is_world_nether_unpacked = os.path.exists(f'{temp_dir}/world_nether')
+            is_world_the_end_unpacked = os.path.exists(f'{temp_dir}/world_the_end')
 
-        worlds_uploaded = 0
+            def delete_and_move(world_name):
+                world_path = f'{config.DOCKER_VOLUME_PATH}/{preset.name}/{world_name}'
+                if os.path.exists(world_path):
+                    shutil.rmtree(world_path)
+                shutil.move(f'{temp_dir}/{world_name}', world_path)
+                if platform.system() == "Linux":
+                    os.system(f"chown -R 1000:1000 {world_path}")
 
-        if is_world_in_unpacked:
-            delete_and_move("world")
-            worlds_uploaded += 1
+            worlds_uploaded = 0
 
-        if is_world_nether_unpacked:
-            delete_and_move("world_nether")
-            worlds_uploaded += 1
+            if is_world_in_unpacked:
+                await asyncio.to_thread(delete_and_move, "world")
+                worlds_uploaded += 1
 
-        if is_world_the_end_unpacked:
-            delete_and_move("world_the_end")
-            worlds_uploaded += 1
+            if is_world_nether_unpacked:
+                await asyncio.to_thread(delete_and_move, "world_nether")
+                worlds_uploaded += 1
 
-        await message_response.edit(content=f"✅ Unpacking complete! World(s) uploaded: `{worlds_uploaded}`")
+            if is_world_the_end_unpacked:
+                await asyncio.to_thread(delete_and_move, "world_the_end")
+                worlds_uploaded += 1
 
-        shutil.rmtree(temp_dir)
-        os.remove(archive_path)
+            await message_response.edit(content=f"✅ Unpacking complete! World(s) uploaded: `{worlds_uploaded}`")
+        finally:
+            # Partial downloads are removed too, unpacking only left something behind if the download succeeded.
+            if temp_dir is not None:
+                await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
 
     @cooldown(1, 10, BucketType.default)
     @discord.slash_command(name='force-stop', description='Force stop the server. (❌ Data can be lost!)')
-    async def force_stop(self, ctx: discord.ApplicationContext):
-        await ctx.defer()
-        await self.preset.shutdown_logic()
+    async def force_stop(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(
+                str, autocomplete=running_names, required=False,
+                description="Running server to stop, defaults to the one using this channel as console."
+            ) = None,
+    ):
+        if preset is not None:
+            session = self.bot.servers.get(preset.lower())
+        else:
+            session = self.bot.servers.by_channel(ctx.channel.id)
 
-        self.running = False
-        self.preset = None
-        self.container = None
-        self.console_channel = None
+        if session is None:
+            return await ctx.respond("❌ There is no such server running.", ephemeral=True)
 
-        await ctx.respond("✅ Force-stopped the server.")
+        await ctx.defer()
+        await self.stop_session(session)
+
+        await ctx.respond(f"✅ Force-stopped `{session.name}`.")
 
     @cooldown(1, 10, BucketType.default)
-    @discord.slash_command(name='start', description='Start minecraft server. (Only one at the time)')
+    @discord.slash_command(name='start', description='Start minecraft server.')
     async def start_server(
             self, ctx: discord.ApplicationContext,
             preset: discord.Option(str, autocomplete=names, description="Name of the preset to use."),
     ):
         name = preset.lower()
-        preset = await Preset.get_or_none(name=name)
+        preset = await Preset.get_cached(name)
 
         if not preset:
             return await ctx.respond(
                 f"❌ There is no preset with name `{name}`, create one by running `/preset create`", ephemeral=True
             )
 
-        if self.running:
+        if session := self.bot.servers.get(name):
+            if session.sleeping:
+                await ctx.respond(f"☀ Waking `{name}` up...")
+                return await self.idle.wake(session, str(ctx.user))
+
             return await ctx.respond(
                 '❌ Server is already running!', ephemeral=True
             )
 
-        initial_response = await ctx.respond("🔃 Starting...")
+        if other := self.bot.servers.by_channel(ctx.channel.id):
+            return await ctx.respond(
+                f'❌ This channel is already the console of `{other.name}`, start the server in another channel.',
+                ephemeral=True
+            )
 
-        await preset.run_server(logging=True, logging_channel=ctx.channel)
+        if other := self.bot.servers.by_port(preset.port):
+            return await ctx.respond(
+                f'❌ Port `{preset.port}` is already used by `{other.name}`, change it in `/preset config`.',
+                ephemeral=True
+            )
 
-        self.running = True
-        self.preset = preset
-        self.container = preset.container
-        self.console_channel = ctx.channel.id
+        self.bot.servers.add(preset, ctx.channel.id)
+
+        try:
+            java_version = Versions.get_by_version(preset.version).value.flag.java_version
+            image = image_name(java_version)
+            _, _, memory_limit = await preset.jvm_settings(java_version)
+
+            ticket = self.bot.admission.request(name, memory_limit)
+        except AdmissionRejected as e:
+            self.bot.servers.remove(name)
+            return await ctx.respond(f"❌ Can't start `{name}`, it {e}.", ephemeral=True)
+        except Exception:
+            self.bot.servers.remove(name)
+            raise
+
+        initial_response = None
+
+        if not ticket.admitted.done():
+            initial_response = await ctx.respond(f"⏳ The host is full, `{name}` will start when there's room...")
+
+            async def on_position(position: int):
+                await initial_response.edit_original_response(
+                    content=f"⏳ The host is full, `{name}` will start when there's room. (#{position} in queue)"
+                )
+
+            try:
+                await self.bot.admission.wait(ticket, on_position)
+            except AdmissionCancelled:
+                return await initial_response.edit_original_response(
+                    content=f"❌ `{name}` was stopped while queued."
+                )
+
+        content = "🔃 Starting..."
+        if not self.bot.images.is_ready(image):
+            content = f"🔃 Starting... (`{image}` isn't pulled yet, this may take a while)"
+
+        if initial_response is None:
+            initial_response = await ctx.respond(content)
+        else:
+            await initial_response.edit_original_response(content=content)
+
+        try:
+            await preset.run_server(logging=True, logging_channel=ctx.channel)
+        except Exception:
+            self.bot.servers.remove(name)
+            self.bot.admission.release(name)
+            raise
 
         await initial_response.edit_original_response(
-            content=f'✅ **Running...** (Type in `{config.CONSOLE_PREFIX}<command>` to send commands to console)'
+            content="🔃 **Loading...** (Waiting for the server to get ready)"
         )
 
+        asyncio.create_task(self.announce_ready(preset, initial_response))
+
+    @staticmethod
+    async def announce_ready(preset: Preset, response):
+        seconds = await preset.wait_until_ready()
+
+        if seconds is not None:
+            content = (
+                f'✅ **Running...** Ready in `{seconds:.1f}s` '
+                f'(Type in `{config.CONSOLE_PREFIX}<command>` to send commands to console)'
+            )
+        elif preset.running:
+            content = f"⚠ Server didn't get ready in `{config.READY_TIMEOUT:.0f}s`, check the console for errors."
+        else:
+            content = "❌ Server stopped before it got ready."
+
+        try:
+            await response.edit_original_response(content=content)
+        except discord.HTTPException:
+            pass  # Interaction tokens expire after 15 minutes.
+
+    @discord.slash_command(name='startup-times', description='Server startup times per version, type and memory.')
+    async def startup_times(
+            self, ctx: discord.ApplicationContext,
+            version: discord.Option(str, choices=versions, required=False, description="Only this version.") = None,
+    ):
+        query = StartupRecord.all().order_by('timestamp')
+        if version is not None:
+            query = query.filter(version=Versions[version].value.name)
+
+        groups: dict[tuple, list[StartupRecord]] = {}
+        for record in await query:
+            groups.setdefault((record.version, record.server_type, record.memory), []).append(record)
+
+        if not groups:
+            return await ctx.respond("ℹ No startups recorded yet.", ephemeral=True)
+
+        def median(values: list[float]) -> float:
+            return statistics.median(values) if values else 0.0
+
+        lines = []
+        for (version_name, server_type, memory), records in sorted(groups.items()):
+            seconds = [x.seconds for x in records]
+            line = (
+                f"`{version_name}` {server_type} {memory} MB » median `{median(seconds):.1f}s`, "
+                f"p90 `{statistics.quantiles(seconds, n=10)[-1] if len(seconds) > 1 else seconds[0]:.1f}s`, "
+                f"last `{seconds[-1]:.1f}s` ({len(seconds)})"
+            )
+
+            # Compare the current image with the one before it, to spot regressions after image updates.
+            images = list(dict.fromkeys(x.image for x in records))
+            if len(images) > 1:
+                current = median([x.seconds for x in records if x.image == images[-1]])
+                previous = median([x.seconds for x in records if x.image == images[-2]])
+                line += f" · `{(current - previous) / previous * 100:+.0f}%` since image update"
+
+            lines.append(line)
+
+        await ctx.respond("**Startup times:**\n" + '\n'.join(lines[:15]))
+
+    @discord.slash_command(name='status', description='Resource usage of a running server.')
+    async def status(
+            self, ctx: discord.ApplicationContext,
+            preset: discord.Option(
+                str, autocomplete=running_names, required=False,
+                description="Running server, defaults to the one using this channel as console."
+            ) = None,
+    ):
+        if preset is not None:
+            session = self.bot.servers.get(preset.lower())
+        else:
+            session = self.bot.servers.by_channel(ctx.channel.id)
+
+        if session is None:
+            return await ctx.respond("❌ There is no such server running.", ephemeral=True)
+
+        series = self.sampler.series.get(session.name)
+
+        if series is None or not len(series.buffers['cpu']):
+            return await ctx.respond("ℹ No samples yet, try again in a few seconds.", ephemeral=True)
+
+        current = series.current()
+        recent = await ResourceSample.filter(
+            preset=session.name, resolution='minute'
+        ).order_by('-timestamp').limit(30)
+        recent.reverse()
+
+        mb = 1024 ** 2
+
+        embed = discord.Embed(colour=discord.Colour.embed_background(), title=f'{session.name} status')
+        embed.add_field(
+            name='CPU', value=f"`{current['cpu']:.1f}%`\n{sparkline(series.buffers['cpu'].values())}"
+        )
+        embed.add_field(
+            name='Memory',
+            value=f"`{current['memory'] / mb:.0f} / {session.preset.memory} MB`\n"
+                  f"{sparkline(series.buffers['memory'].values())}"
+        )
+        embed.add_field(
+            name='Network',
+            value=f"⬇ `{current['net_rx'] / 1024:.1f} KB/s` ⬆ `{current['net_tx'] / 1024:.1f} KB/s`"
+        )
+        embed.add_field(
+            name='Disk',
+            value=f"📖 `{current['block_read'] / 1024:.1f} KB/s` ✏ `{current['block_write'] / 1024:.1f} KB/s`"
+        )
+
+        if recent:
+            embed.add_field(
+                name=f'Last {len(recent)} minute(s)',
+                value=f"CPU `{sparkline([x.cpu for x in recent])}` "
+                      f"(avg `{sum(x.cpu for x in recent) / len(recent):.1f}%`)\n"
+                      f"Memory `{sparkline([x.memory for x in recent])}` "
+                      f"(peak `{max(x.memory_max for x in recent) / mb:.0f} MB`)",
+                inline=False
+            )
+
+        await ctx.respond(embed=embed)
+
+    @discord.slash_command(
+        name='capacity', description='Memory and CPU reserved by running servers, and queued starts.'
+    )
+    async def capacity(self, ctx: discord.ApplicationContext):
+        admission = self.bot.admission
+        used_memory, used_cpus = admission.used()
+
+        content = (
+            f"**Memory:** `{used_memory}` / `{admission.memory if admission.memory is not None else '∞'}` MB\n"
+            f"**CPUs:** `{used_cpus:g}` / `{admission.cpus:g}`\n"
+        )
+        content += ''.join(
+            f"🟢 `{name}` » {memory} MB, {cpus:g} CPU(s)\n" for name, (memory, cpus) in admission.reserved.items()
+        )
+        content += ''.join(
+            f"⏳ `{x.name}` » {x.memory} MB, {x.cpus:g} CPU(s) (#{i} in queue)\n"
+            for i, x in enumerate(admission.queue, start=1)
+        )
+
+        await ctx.respond(content)
+
+    @discord.slash_command(name='images', description='Show whether server images are pulled and ready.')
+    async def images(self, ctx: discord.ApplicationContext):
+        icons = {'ready': '✅', 'pulling': '🔃', 'failed': '❌', 'unknown': '❔'}
+
+        content = ''.join(
+            f"{icons[status.state]} `{image}` » {status.state} (<t:{int(status.updated_at)}:R>)"
+            f"{f' - `{status.error}`' if status.error else ''}\n"
+            for image, status in self.bot.images.status.items()
+        )
+
+        await ctx.respond(f"**Server images:**\n{content}")
+
 
 def setup(bot):
     bot.add_cog(Minecraft(bot))
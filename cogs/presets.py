@@ -6,7 +6,9 @@ from discord import SlashCommandGroup
 
 import config
 from src import Versions as VersionsEnum, PresetEmbed
-from src.models import Preset
+from src.containers import containers
+from src.jvm import PROFILES, supports
+from src.models import Preset, LogRule, PresetTuning
 
 
 async def versions(ctx: discord.AutocompleteContext):
@@ -14,7 +16,7 @@ async def versions(ctx: discord.AutocompleteContext):
 
 
 async def names(ctx: discord.AutocompleteContext):
-    return [discord.OptionChoice(x.name) for x in await Preset.all() if x.name.startswith(ctx.value)]
+    return [discord.OptionChoice(x) for x in ctx.bot.preset_names.complete(ctx.value.lower())]
 
 
 class Presets(discord.Cog):
@@ -51,6 +53,8 @@ class Presets(discord.Cog):
                 ephemeral=True
             )
 
+        self.bot.preset_names.add(created_preset.name)
+
         embed = PresetEmbed(created_preset)
 
         await ctx.respond(
@@ -89,7 +93,7 @@ class Presets(discord.Cog):
     ):
         name = name.lower()
 
-        preset = await Preset.get_or_none(name=name)
+        preset = await Preset.get_cached(name)
 
         if not preset:
             return await ctx.respond(f"❌ There is no preset with name `{name}`", ephemeral=True)
@@ -125,6 +129,92 @@ class Presets(discord.Cog):
             embed=PresetEmbed(preset)
         )
 
+    @preset.command(
+        name='tuning', description='Choose the JVM profile of a preset, and whether memory is auto sized.'
+    )
+    async def preset_tuning(
+            self, ctx: discord.ApplicationContext,
+            name: discord.Option(
+                str, max_length=20, description="Name of the preset.", autocomplete=names, min_length=1
+            ),
+            profile: discord.Option(str, choices=list(PROFILES), required=False) = None,
+            auto_size: discord.Option(
+                bool, required=False,
+                description="Size heap and container from measured usage (see /preset recommend)"
+            ) = None,
+    ):
+        name = name.lower()
+        preset = await Preset.get_cached(name)
+
+        if not preset:
+            return await ctx.respond(f"❌ There is no preset with name `{name}`", ephemeral=True)
+
+        java_version = VersionsEnum.get_by_version(preset.version).value.flag.java_version
+
+        if profile is not None and not supports(PROFILES[profile], java_version):
+            return await ctx.respond(
+                f"❌ `{profile}` doesn't work with `{java_version}` that `{preset.version}` runs on.", ephemeral=True
+            )
+
+        tuning, _ = await PresetTuning.get_or_create(preset=name)
+
+        if profile is not None:
+            tuning.profile = profile
+        if auto_size is not None:
+            tuning.auto_size = auto_size
+
+        await tuning.save()
+
+        await ctx.respond(
+            f"✅ `{name}` uses the `{tuning.profile}` profile ({PROFILES[tuning.profile].description}), "
+            f"memory is {'auto sized' if tuning.auto_size else f'`{preset.memory}M`'}. "
+            f"Takes effect on the next start."
+        )
+
+    @preset.command(
+        name='recommend', description='Recommended heap size and memory of a preset, from measured usage.'
+    )
+    async def preset_recommend(
+            self, ctx: discord.ApplicationContext,
+            name: discord.Option(
+                str, max_length=20, description="Name of the preset.", autocomplete=names, min_length=1
+            ),
+    ):
+        name = name.lower()
+        preset = await Preset.get_cached(name)
+
+        if not preset:
+            return await ctx.respond(f"❌ There is no preset with name `{name}`", ephemeral=True)
+
+        tuning = await PresetTuning.get_or_none(preset=name)
+        profile = PROFILES.get(tuning.profile if tuning else 'default', PROFILES['default'])
+        recommendation = await preset.recommend_memory(profile)
+
+        if recommendation is None and preset.heap_sampling_error is not None:
+            return await ctx.respond(
+                f"❌ Heap sampling is unavailable for `{name}`: `{preset.heap_sampling_error}`", ephemeral=True
+            )
+
+        if recommendation is None:
+            return await ctx.respond(
+                f"ℹ Not enough measurements yet, `{name}` needs to run for about "
+                f"{config.HEAP_MIN_SAMPLES * config.HEAP_SAMPLE_INTERVAL / 60:.0f} minutes first.",
+                ephemeral=True
+            )
+
+        current_heap = round(preset.memory * profile.heap_ratio)
+        gc_percent = f'{recommendation.gc_percent:.2f}%' if recommendation.gc_percent is not None else 'unknown'
+
+        await ctx.respond(
+            f"**Memory of `{name}`** ({recommendation.samples} samples, `{profile.name}` profile)\n"
+            f"Live heap: `{recommendation.live}M`, peak heap: `{recommendation.peak}M`, "
+            f"peak container memory: `{f'{recommendation.rss}M' if recommendation.rss else 'unknown'}`\n"
+            f"Time spent in GC: `{gc_percent}`\n\n"
+            f"Heap: `{current_heap}M` → `{recommendation.heap}M`\n"
+            f"Container limit: `{preset.memory}M` → `{recommendation.limit}M`\n"
+            f"*Use `/preset tuning {name} auto_size:True` to apply it on every start.*"
+        )
+
     @preset.command(name='delete', description='Delete configuration preset.')
     async def preset_delete(
             self, ctx: discord.ApplicationContext,
@@ -135,12 +225,23 @@ class Presets(discord.Cog):
     ):
         preset_name = preset_name.lower()
 
-        preset = await Preset.get_or_none(name=preset_name)
+        preset = await Preset.get_cached(preset_name)
 
         if not preset:
             return await ctx.respond(f"❌ There is no preset with name `{preset_name}`", ephemeral=True)
 
+        # Sleeping servers aren't running, but still have a session and a proxy holding their port.
+        if preset.running or preset.name in self.bot.servers:
+            return await ctx.respond(
+                f"❌ Preset `{preset.name}` is running or sleeping, stop it first.", ephemeral=True
+            )
+
         await preset.delete()
+        self.bot.preset_names.remove(preset.name)
+        await containers.remove(preset.name)
+        await LogRule.filter(preset=preset.name).delete()
+        await PresetTuning.filter(preset=preset.name).delete()
+
         await ctx.respond(f'✅ Successfully deleted preset `{preset.name}`.')
 
 
@@ -18,21 +18,140 @@ else:
     HOME_PATH = os.getenv("HOME")
 
 VERSIONS = Versions
-COGS = ['basic', 'minecraft', 'presets']
+COGS = ['basic', 'minecraft', 'presets', 'backups', 'logs']
 SERVER_TYPES = ['VANILLA', 'SPIGOT', 'PAPER']
 DIMENSIONS = ['world', 'world_nether', 'world_the_end']
 
 # The path to your HTTP server directory, worlds from "/extract world" will end-up there
 HTTP_SERVER_PATH: str = f'{HOME_PATH}/Public'.replace("\\", "/")
+# How many processes can archive worlds at once ("/world download" uses one per dimension).
+ARCHIVE_WORKERS: int = min(os.cpu_count() or 1, len(DIMENSIONS))
+
+# "/world upload" archives bigger than this (in bytes) are rejected, they are streamed to disk in chunks.
+WORLD_UPLOAD_MAX_SIZE: int = 8 * 1024 ** 3
+DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+DOWNLOAD_RETRIES: int = 3  # Interrupted downloads are resumed (if the origin supports it) this many times.
+DOWNLOAD_PROGRESS_INTERVAL: float = 3.0  # Seconds between progress updates.
+
+# "/world download" keeps a manifest of file hashes for every download here, to allow downloading only changes.
+MANIFEST_PATH: str = f'{HOME_PATH}/Docker/MinecraftManifests'.replace("\\", "/")
+# Only files matching these patterns are included in "changes since" downloads.
+DELTA_FILE_PATTERNS: list[str] = [
+    '*/region/*.mca', '*/entities/*.mca', '*/poi/*.mca', '*/playerdata/*', '*/level.dat'
+]
+
 # IP and PORT to your HTTP server, used just to access it, not set it up.
 HTTP_SERVER_IP: str = IP
 HTTP_SERVER_PORT: str = '6969'
 
+# Every outbound request (webhooks, uploads, ...) shares one connection pool, at most HTTP_POOL_SIZE
+# connections, HTTP_POOL_PER_HOST of them to the same host. Idle connections are kept for HTTP_KEEPALIVE
+# seconds and DNS answers cached for HTTP_DNS_CACHE_TTL seconds.
+HTTP_POOL_SIZE: int = 100
+HTTP_POOL_PER_HOST: int = 10
+HTTP_KEEPALIVE: float = 30.0
+HTTP_DNS_CACHE_TTL: int = 300
+
+# Critical logs sent in the same CRITICAL_LOG_FLUSH_INTERVAL seconds are grouped into one webhook message.
+CRITICAL_LOG_FLUSH_INTERVAL: float = 2.0
+
+# Prometheus metrics (command latency, docker calls, webhooks, archives) are served on
+# http://METRICS_HOST:METRICS_PORT/metrics. Set METRICS_PORT to None to turn it off.
+METRICS_HOST: str = '127.0.0.1'
+METRICS_PORT: int | None = 9108
+
 # LOG_AVATAR: str = "" # unused
 
+# Console logs are grouped into messages and sent to the log channel every LOG_FLUSH_INTERVAL seconds.
+LOG_FLUSH_INTERVAL: float = 2.0
+# If discord can't keep up, only this many lines are kept waiting, older ones are skipped.
+LOG_MAX_PENDING_LINES: int = 2000
+
+# How many presets are kept in memory, running ones are always kept.
+PRESET_CACHE_SIZE: int = 256
+
+# Console commands are sent through RCON, port inside the container and how long to wait for a reply (seconds).
+RCON_PORT: int = 25575
+RCON_TIMEOUT: float = 5.0
+
+# Image servers run on, the tag is the java flag of the version (see src/versions.py).
+DOCKER_IMAGE: str = 'itzg/minecraft-server'
+# Images of every java version are pulled on startup, and re-pulled once a day between these hours (local time).
+IMAGE_REFRESH_HOURS: tuple[int, int] = (4, 6)
+IMAGE_REFRESH_CHECK_INTERVAL: float = 600.0
+IMAGE_PULL_CONCURRENCY: int = 1
+
+# A started server counts as ready once it logs its "Done (X.XXXs)!" line, or RCON answers (checked every
+# READY_POLL_INTERVAL seconds). "/start" gives up waiting after READY_TIMEOUT seconds.
+READY_TIMEOUT: float = 600.0
+READY_POLL_INTERVAL: float = 5.0
+
+# Docker calls are blocking, they are made on this many background threads to keep the bot responsive.
+DOCKER_WORKERS: int = 8
+
+# Running servers' resource usage is sampled every STATS_INTERVAL seconds ("/status"), the last STATS_BUFFER_SIZE
+# samples are kept in memory and minute/hour averages are saved to the database.
+STATS_INTERVAL: float = 10.0
+STATS_BUFFER_SIZE: int = 60
+STATS_MINUTE_RETENTION: int = 48  # Hours to keep minute averages for, hour averages are kept forever.
+
+# Console logs of every preset are compressed into LOG_ARCHIVE_PATH for "/logs search", in segments of up to
+# LOG_SEGMENT_SIZE bytes, the newest LOG_ARCHIVE_SEGMENTS segments of each preset are kept.
+# The last LOG_TAIL_LINES lines of running servers are also kept in memory for "/logs tail".
+LOG_ARCHIVE_PATH: str = f'{HOME_PATH}/Docker/MinecraftLogs'.replace("\\", "/")
+LOG_ARCHIVE_BLOCK_SIZE: int = 64 * 1024  # Uncompressed, lines are compressed and indexed in blocks this big.
+LOG_ARCHIVE_FLUSH_INTERVAL: float = 5.0
+LOG_SEGMENT_SIZE: int = 4 * 1024 ** 2
+LOG_ARCHIVE_SEGMENTS: int = 50
+LOG_TAIL_LINES: int = 1000
+
+# Running servers reserve their memory limit and SERVER_CPUS cores, "/start" waits in a queue (of up to
+# ADMISSION_QUEUE_SIZE starts) when the host has no room left. HOST_MEMORY_BUDGET is in MB, None means the host's
+# RAM minus HOST_MEMORY_RESERVED, HOST_CPU_BUDGET None means every core.
+HOST_MEMORY_BUDGET: int | None = None
+HOST_MEMORY_RESERVED: int = 2048
+HOST_CPU_BUDGET: float | None = None
+SERVER_CPUS: float = 1.0
+ADMISSION_QUEUE_SIZE: int = 10
+
+# Heap usage of running servers is sampled every HEAP_SAMPLE_INTERVAL seconds and kept for HEAP_SAMPLE_RETENTION
+# hours, "/preset recommend" (and presets with auto sizing) need at least HEAP_MIN_SAMPLES samples.
+HEAP_SAMPLE_INTERVAL: float = 60.0
+HEAP_SAMPLE_RETENTION: int = 7 * 24
+HEAP_MIN_SAMPLES: int = 30
+
+# Servers nobody played on for IDLE_TIMEOUT seconds are stopped to free their memory (0 to never do it),
+# the bot keeps listening on their port and starts them again when someone joins.
+IDLE_TIMEOUT: float = 30 * 60
+IDLE_CHECK_INTERVAL: float = 30.0
+SLEEP_MOTD: str = '💤 Sleeping, join to wake the server up!'
+
+# When the bot shuts down, every server is asked to save and stop at once. Servers still running
+# SHUTDOWN_DEADLINE seconds later are killed.
+SHUTDOWN_DEADLINE: float = 30.0
+
+# Containers created by the bot are labeled with this, nothing without the label is ever removed.
+CONTAINER_LABEL: str = 'minecraft-server-manager'
+# Keep stopped containers and start them again if the preset's config didn't change, instead of recreating them.
+REUSE_CONTAINERS: bool = True
+
 # Path to the directory where you would like to store server files.
 DOCKER_VOLUME_PATH: str = f'{HOME_PATH}/Docker/Minecraft'.replace("\\", "/")
 
+# Server jars and libraries are stored once here and hardlinked into every preset of the same version and
+# server type (copied if it's on a different filesystem than DOCKER_VOLUME_PATH), so new presets skip the download.
+# Only jars matching SHARED_CACHE_JARS directly in the server directory (the server jar) and the files under
+# SHARED_CACHE_DIRECTORIES are shared. Shared files changed in place by a server are taken out of the cache.
+SHARED_CACHE_PATH: str = f'{HOME_PATH}/Docker/MinecraftShared'.replace("\\", "/")
+SHARED_CACHE_JARS: str = '*.jar'
+SHARED_CACHE_DIRECTORIES: list[str] = ['libraries', 'versions']
+
+# Where "/backup" stores world snapshots. Files are split into BACKUP_CHUNK_SIZE chunks and every unique chunk
+# is stored once, so snapshots only cost as much as what changed since the previous ones.
+BACKUP_PATH: str = f'{HOME_PATH}/Docker/MinecraftBackups'.replace("\\", "/")
+BACKUP_CHUNK_SIZE: int = 64 * 1024  # Keep it a multiple of 4096, region files are made of 4 KiB sectors.
+BACKUP_COMPRESSION_LEVEL: int = 1
+
 ESCAPED_CHARACTERS: dict = {  # Used to prevent people from escaping from minecraft console to bash.
     "-": r"\-",
     "]": r"\]",
@@ -1,6 +1,6 @@
 import os
 import asyncio
-import requests
+import aiohttp
 import discord
 from dotenv import load_dotenv
 from tortoise import connections
@@ -8,44 +8,87 @@ from tortoise import connections
 load_dotenv()
 
 import config
-from src import bot_instance, docker_client, db_init
+import src
+from src import bot_instance, db_init
 from src.models.preset import Preset
+from src.containers import containers
+from src.http_client import http_client
+from src.archive import shutdown_pool
+from src.shutdown import ShutdownCoordinator
+from src.startup import StartupTimer
 
 
-# from src import db_init
+async def probe_file_server():
+    try:
+        async with http_client.session.get(
+                f'http://{os.getenv("IP")}:{config.HTTP_SERVER_PORT}', timeout=aiohttp.ClientTimeout(total=3)
+        ):
+            print('☑ File server is up!')
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        print("❌ Couldn't connect to file server.")
 
 
-async def main():
+async def connect_docker():
+    try:
+        await src.docker_backend.connect()
+        print('☑ Connected to docker!')
+    except Exception as e:
+        print(f"❌ Couldn't connect to docker, it will be retried on first use. ({e})")
+
+    bot_instance.images.start()
+
+
+async def init_database():
     await db_init()
-    await bot_instance.start(os.getenv("TOKEN"))
+    bot_instance.preset_names.build(await Preset.all().values_list('name', flat=True))
 
 
-async def stop_running_containers():
-    for container in docker_client.containers.list():
-        preset = await Preset.get_or_none(name=container.name)
-        await preset.shutdown_logic(5.0)
+def load_cogs():
+    for cog in config.COGS:
+        bot_instance.load_extension(f'cogs.{cog}')
+        print(f'☑ Loaded {cog}')
 
-        container.stop()
-        print(f'Stopped {container.name}')
 
+async def report_when_ready(timer: StartupTimer, *phases: asyncio.Task):
+    await asyncio.gather(bot_instance.wait_until_ready(), *phases)
+    timer.mark('discord ready')
+    timer.report()
 
-@bot_instance.check
-async def overall_check(ctx: discord.ApplicationContext):
-    return ctx.user.id in bot_instance.config.WHITELIST
 
+async def main():
+    timer = StartupTimer()
+    http_client.start()
 
-if __name__ == "__main__":
+    probe = asyncio.create_task(timer.run('file server probe', probe_file_server()))
+    docker_connect = asyncio.create_task(timer.run('docker connect', connect_docker()))
+    database = asyncio.create_task(timer.run('database', init_database()))
 
+    # Let them start waiting on the network/disk before cogs get imported on this thread.
+    await asyncio.sleep(0)
+
+    with timer.measure('cogs'):
+        load_cogs()
+
+    # Only the database is needed to log in, the rest finishes in the background.
+    await database
+
+    asyncio.create_task(report_when_ready(timer, probe, docker_connect))
+    await bot_instance.start(os.getenv("TOKEN"))
+
+
+async def remove_stale_containers():
     try:
-        resp = requests.get(url=f'http://{os.getenv("IP")}:6969')
-        print('☑ File server is up!')
-    except requests.exceptions.ConnectionError:
-        print("❌ Couldn't connect to file server.")
+        await containers.remove_stale(set(await Preset.all().values_list('name', flat=True)))
+    except Exception as e:
+        print(f"❌ Couldn't remove stale containers: {e}")
 
-    for cog in config.COGS:
-        bot_instance.load_extension(f'cogs.{cog}')
-        print(f'☑ Loaded {cog}')
 
+@bot_instance.check
+async def overall_check(ctx: discord.ApplicationContext):
+    return ctx.user.id in bot_instance.config.WHITELIST
+
+
+if __name__ == "__main__":
     event_loop = asyncio.get_event_loop_policy().get_event_loop()
 
     try:
@@ -55,10 +98,15 @@ if __name__ == "__main__":
     finally:
         print("🛑 Shutting Down, wait till everything cleans up.")
 
-        event_loop.run_until_complete(stop_running_containers())
+        bot_instance.images.stop()
+        event_loop.run_until_complete(ShutdownCoordinator(bot_instance).run())
+        event_loop.run_until_complete(bot_instance.close_critical_log())
+        event_loop.run_until_complete(http_client.close())
+        event_loop.run_until_complete(bot_instance.metrics.close())
 
-        docker_client.containers.prune()
-        docker_client.volumes.prune()
+        event_loop.run_until_complete(remove_stale_containers())
+        src.docker_backend.close()
+        shutdown_pool()
 
         event_loop.run_until_complete(connections.close_all(discard=True))
         event_loop.run_until_complete(bot_instance.close())
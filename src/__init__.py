@@ -4,6 +4,7 @@ from .versions import Versions
 from .utils import ensure_directory_exists
 from .database import db_init
 from .exceptions import *
+from .docker_backend import DockerBackend, FakeDockerBackend
 import docker
 
-docker_client = docker.from_env()
+docker_backend = DockerBackend(docker.from_env)
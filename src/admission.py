@@ -0,0 +1,156 @@
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable
+
+import config
+from .exceptions import AdmissionCancelled, AdmissionRejected
+
+
+def _host_memory() -> int | None:
+    """Memory (MB) servers may use altogether, total RAM minus `config.HOST_MEMORY_RESERVED`."""
+    if config.HOST_MEMORY_BUDGET is not None:
+        return config.HOST_MEMORY_BUDGET
+
+    try:
+        total = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 1024 ** 2
+    except (AttributeError, ValueError, OSError):  # Not available on Windows.
+        return None
+
+    return max(total - config.HOST_MEMORY_RESERVED, 0)
+
+
+class Ticket:
+    def __init__(self, name: str, memory: int, cpus: float):
+        self.name = name
+        self.memory = memory
+        self.cpus = cpus
+        self.admitted = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """
+    Keeps running servers within the host's memory and CPU budget.
+
+    Every server reserves its container memory limit and `config.SERVER_CPUS` cores until it stops.
+    A start that doesn't fit waits in a FIFO queue and is admitted, in order, as soon as enough is released,
+    so one big preset can't be starved by smaller ones either. Starts that could never fit are rejected.
+
+    The budget is worked out on first use, the controller is created before config is fully loaded.
+    """
+
+    def __init__(self):
+        self._budget: tuple[int | None, float] | None = None
+
+        self.reserved: dict[str, tuple[int, float]] = {}
+        self.queue: deque[Ticket] = deque()
+        self._changed = asyncio.Condition()
+
+    @property
+    def budget(self) -> tuple[int | None, float]:
+        """Memory (MB, None if unknown) and CPUs servers may use altogether."""
+        if self._budget is None:
+            self._budget = _host_memory(), config.HOST_CPU_BUDGET or os.cpu_count()
+
+        return self._budget
+
+    @property
+    def memory(self) -> int | None:
+        return self.budget[0]
+
+    @property
+    def cpus(self) -> float:
+        return self.budget[1]
+
+    def used(self) -> tuple[int, float]:
+        return sum(x[0] for x in self.reserved.values()), sum(x[1] for x in self.reserved.values())
+
+    def _fits(self, memory: int, cpus: float) -> bool:
+        used_memory, used_cpus = self.used()
+        return (self.memory is None or used_memory + memory <= self.memory) and used_cpus + cpus <= self.cpus
+
+    def request(self, name: str, memory: int, cpus: float = None) -> Ticket:
+        """
+        Ask to reserve capacity for a server, the ticket's `admitted` future is done once it's reserved.
+        Raises `AdmissionRejected` if the server is bigger than the whole budget or the queue is full.
+        """
+        cpus = cpus if cpus is not None else config.SERVER_CPUS
+
+        if (self.memory is not None and memory > self.memory) or cpus > self.cpus:
+            raise AdmissionRejected(
+                f"needs {memory} MB and {cpus:g} CPU(s), "
+                f"the host only has {self.memory} MB and {self.cpus:g} for servers"
+            )
+
+        ticket = Ticket(name, memory, cpus)
+
+        if not self.queue and self._fits(memory, cpus):
+            self.reserved[name] = (memory, cpus)
+            ticket.admitted.set_result(None)
+            return ticket
+
+        if len(self.queue) >= config.ADMISSION_QUEUE_SIZE:
+            raise AdmissionRejected(f"the host is full and {len(self.queue)} start(s) are already waiting")
+
+        self.queue.append(ticket)
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """1 based position in the queue, 0 once admitted."""
+        try:
+            return self.queue.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self, ticket: Ticket, on_position: Callable[[int], Awaitable] = None):
+        """
+        Wait until the ticket is admitted, calling `on_position` whenever its place in the queue changes.
+        Raises `AdmissionCancelled` if the start is taken out of the queue first.
+        """
+        last = None
+
+        while not ticket.admitted.done():
+            position = self.position(ticket)
+
+            if on_position is not None and position and position != last:
+                last = position
+                await on_position(position)
+
+            async with self._changed:
+                if not ticket.admitted.done():
+                    await self._changed.wait()
+
+        ticket.admitted.result()
+
+    def cancel(self, name: str) -> bool:
+        """Take a server's start out of the queue, returns whether it was queued."""
+        cancelled = False
+
+        for ticket in list(self.queue):
+            if ticket.name == name:
+                self.queue.remove(ticket)
+                ticket.admitted.set_exception(AdmissionCancelled('stopped while queued'))
+                cancelled = True
+
+        if cancelled:
+            self._admit()
+
+        return cancelled
+
+    def release(self, name: str):
+        """Free what a server reserved, or take its start out of the queue."""
+        self.reserved.pop(name, None)
+        self.cancel(name)
+        self._admit()
+
+    def _admit(self):
+        while self.queue and self._fits(self.queue[0].memory, self.queue[0].cpus):
+            ticket = self.queue.popleft()
+            self.reserved[ticket.name] = (ticket.memory, ticket.cpus)
+            ticket.admitted.set_result(None)
+
+        asyncio.create_task(self._notify())
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable
+
+import config
+from .metrics import WORLD_ARCHIVE_BYTES, WORLD_ARCHIVE_SECONDS
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, see requirements.txt
+    zstandard = None
+
+# codec: (extension, default level, (min level, max level))
+CODECS: dict[str, tuple[str, int | None, tuple[int, int] | None]] = {
+    'store': ('.zip', None, None),
+    'deflate': ('.zip', 6, (0, 9)),
+    'zstd': ('.tar.zst', 3, (1, 22)),
+}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def available_codecs() -> list[str]:
+    return [x for x in CODECS if x != 'zstd' or zstandard is not None]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=config.ARCHIVE_WORKERS)
+
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+    _pool = None
+
+
+def _walk(source: str):
+    for root, _, files in os.walk(source):
+        for file in files:
+            path = os.path.join(root, file)
+            yield path, os.path.relpath(path, source).replace("\\", "/")
+
+
+def _write_archive(path: str, codec: str, level: int | None, entries) -> tuple[str, int]:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if codec == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=level)
+
+        with open(path, 'wb') as file, compressor.stream_writer(file) as writer:
+            with tarfile.open(fileobj=writer, mode='w|') as tar:
+                for file_path, arcname in entries:
+                    tar.add(file_path, arcname=arcname)
+    else:
+        compression = zipfile.ZIP_STORED if codec == 'store' else zipfile.ZIP_DEFLATED
+
+        with zipfile.ZipFile(path, 'w', compression=compression, compresslevel=level, allowZip64=True) as zf:
+            for file_path, arcname in entries:
+                zf.write(file_path, arcname)
+
+    return path, os.path.getsize(path)
+
+
+def archive_directory(source: str, destination: str, codec: str, level: int | None) -> tuple[str, int]:
+    """
+    Archive the contents of `source` into `destination` + codec extension.
+    Runs inside a worker process, returns path of the archive and its size in bytes.
+    """
+    return _write_archive(f'{destination}{CODECS[codec][0]}', codec, level, _walk(source))
+
+
+def archive_files(root: str, files: list[str], destination: str, codec: str, level: int | None) -> tuple[str, int]:
+    """Same as `archive_directory`, but only for `files` (relative to `root`)."""
+    return _write_archive(
+        f'{destination}{CODECS[codec][0]}', codec, level, ((f'{root}/{x}', x) for x in files)
+    )
+
+
+def _resolve_level(codec: str, level: int | None) -> int | None:
+    if codec not in available_codecs():
+        raise ValueError(f'Codec {codec} is not available.')
+
+    default_level, bounds = CODECS[codec][1:]
+    if bounds is None:
+        return None
+
+    return default_level if level is None else min(max(level, bounds[0]), bounds[1])
+
+
+async def archive_changes(
+        root: str, files: list[str], destination: str, codec: str = 'deflate', level: int = None
+) -> tuple[str, int]:
+    """Archive a list of files from `root` in a worker process, see `archive_files`."""
+    level = _resolve_level(codec, level)
+
+    with WORLD_ARCHIVE_SECONDS.labels(codec).time():
+        path, size = await asyncio.get_running_loop().run_in_executor(
+            _get_pool(), archive_files, root, files, destination, codec, level
+        )
+
+    WORLD_ARCHIVE_BYTES.labels(codec).inc(size)
+    return path, size
+
+
+async def archive_worlds(
+        source_root: str, destination_root: str, dimensions: list[str],
+        codec: str = 'deflate', level: int = None,
+        on_progress: Callable[[str, int, int], Awaitable] = None
+) -> dict[str, tuple[str, int] | None]:
+    """
+    Archive every dimension in parallel, one worker process per dimension.
+
+    `on_progress(dimension, done, total)` is awaited as each archive finishes.
+    Dimensions that don't exist in `source_root` map to None.
+    """
+    level = _resolve_level(codec, level)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+
+    async def run(dimension: str, start_path: str):
+        with WORLD_ARCHIVE_SECONDS.labels(codec).time():
+            path, size = await loop.run_in_executor(
+                pool, archive_directory, start_path, f'{destination_root}/{dimension}', codec, level
+            )
+
+        WORLD_ARCHIVE_BYTES.labels(codec).inc(size)
+        return dimension, (path, size)
+
+    results: dict[str, tuple[str, int] | None] = {}
+    jobs = []
+
+    for dimension in dimensions:
+        start_path = f'{source_root}/{dimension}'
+
+        if not os.path.exists(start_path):
+            results[dimension] = None
+            continue
+
+        jobs.append(run(dimension, start_path))
+
+    for done, job in enumerate(asyncio.as_completed(jobs), 1):
+        dimension, result = await job
+        results[dimension] = result
+
+        if on_progress is not None:
+            await on_progress(dimension, done, len(jobs))
+
+    return results
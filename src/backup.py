@@ -0,0 +1,211 @@
+import datetime
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import zlib
+
+import config
+
+
+class BackupStore:
+    """
+    Content-addressed world backups.
+
+    Every file is split into fixed size chunks (`config.BACKUP_CHUNK_SIZE`, a multiple of the 4 KiB
+    sectors region files are made of), each chunk is stored once under its sha256 in `chunks/`,
+    and a snapshot is just a JSON list of files and the chunks they're made of.
+    Region files that didn't change between snapshots cost nothing but a few manifest lines.
+
+    All methods are blocking, call them with `asyncio.to_thread`.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = (root or config.BACKUP_PATH).replace("\\", "/")
+        self.chunks_dir = f'{self.root}/chunks'
+
+    def _snapshots_dir(self, preset: str) -> str:
+        return f'{self.root}/snapshots/{preset}'
+
+    def _chunk_path(self, digest: str) -> str:
+        return f'{self.chunks_dir}/{digest[:2]}/{digest}'
+
+    def _store_chunk(self, data: bytes) -> tuple[str, bool]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+
+        if os.path.exists(path):
+            return digest, False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(zlib.compress(data, config.BACKUP_COMPRESSION_LEVEL))
+        os.replace(temp_path, path)
+
+        return digest, True
+
+    def create(self, preset: str) -> dict:
+        """Snapshot every dimension of the preset's volume, returns the snapshot manifest."""
+        volume = f'{config.DOCKER_VOLUME_PATH}/{preset}'
+        # Microseconds keep two snapshots taken in the same second apart (and sorted).
+        snapshot_id = datetime.datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')
+
+        files = {}
+        new_chunks = 0
+        new_bytes = 0
+        total_bytes = 0
+
+        for dimension in config.DIMENSIONS:
+            for root, _, filenames in os.walk(f'{volume}/{dimension}'):
+                for filename in filenames:
+                    path = os.path.join(root, filename)
+                    relative = os.path.relpath(path, volume).replace("\\", "/")
+
+                    digests = []
+                    with open(path, 'rb') as file:
+                        while chunk := file.read(config.BACKUP_CHUNK_SIZE):
+                            digest, is_new = self._store_chunk(chunk)
+                            digests.append(digest)
+                            total_bytes += len(chunk)
+
+                            if is_new:
+                                new_chunks += 1
+                                new_bytes += len(chunk)
+
+                    files[relative] = {'size': os.path.getsize(path), 'chunks': digests}
+
+        manifest = {
+            'id': snapshot_id,
+            'preset': preset,
+            'created_at': datetime.datetime.utcnow().isoformat(),
+            'size': total_bytes,
+            'new_bytes': new_bytes,
+            'new_chunks': new_chunks,
+            'files': files,
+        }
+
+        snapshots_dir = self._snapshots_dir(preset)
+        os.makedirs(snapshots_dir, exist_ok=True)
+
+        # 'x' fails instead of silently replacing an existing snapshot.
+        with open(f'{snapshots_dir}/{snapshot_id}.json', 'x') as file:
+            json.dump(manifest, file)
+
+        return manifest
+
+    def snapshots(self, preset: str) -> list[dict]:
+        """Snapshots of the preset, newest first, without their file lists."""
+        snapshots_dir = self._snapshots_dir(preset)
+
+        if not os.path.exists(snapshots_dir):
+            return []
+
+        snapshots = []
+        for filename in sorted(os.listdir(snapshots_dir), reverse=True):
+            if not filename.endswith('.json'):
+                continue
+
+            manifest = self._load(preset, filename.removesuffix('.json'))
+            del manifest['files']
+            snapshots.append(manifest)
+
+        return snapshots
+
+    def _load(self, preset: str, snapshot_id: str) -> dict | None:
+        if not re.fullmatch(r'[0-9-]+', snapshot_id):
+            return None
+
+        path = f'{self._snapshots_dir(preset)}/{snapshot_id}.json'
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as file:
+            return json.load(file)
+
+    def restore(self, preset: str, snapshot_id: str) -> int | None:
+        """
+        Replace the preset's dimensions with the ones from the snapshot.
+        Returns amount of restored files, or None if there is no such snapshot.
+        """
+        manifest = self._load(preset, snapshot_id)
+
+        if manifest is None:
+            return None
+
+        volume = f'{config.DOCKER_VOLUME_PATH}/{preset}'
+        temp_dir = f'{volume}/Restore'
+
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+
+        for relative, entry in manifest['files'].items():
+            path = f'{temp_dir}/{relative}'
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(path, 'wb') as file:
+                for digest in entry['chunks']:
+                    with open(self._chunk_path(digest), 'rb') as chunk:
+                        file.write(zlib.decompress(chunk.read()))
+
+        # Only swap worlds in once everything was rebuilt, so a missing chunk can't leave a half-restored world.
+        for dimension in config.DIMENSIONS:
+            world_path = f'{volume}/{dimension}'
+
+            if os.path.exists(world_path):
+                shutil.rmtree(world_path)
+
+            if os.path.exists(f'{temp_dir}/{dimension}'):
+                shutil.move(f'{temp_dir}/{dimension}', world_path)
+
+                if platform.system() == "Linux":
+                    os.system(f"chown -R 1000:1000 {world_path}")
+
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return len(manifest['files'])
+
+    def prune(self, preset: str, keep: int) -> tuple[int, int]:
+        """
+        Delete all but the `keep` newest snapshots of the preset, then every chunk
+        no snapshot (of any preset) references anymore.
+
+        :return: Deleted snapshots and freed bytes.
+        """
+        snapshots_dir = self._snapshots_dir(preset)
+        removed = 0
+
+        for snapshot in self.snapshots(preset)[keep:]:
+            os.remove(f'{snapshots_dir}/{snapshot["id"]}.json')
+            removed += 1
+
+        return removed, self._collect_garbage()
+
+    def _collect_garbage(self) -> int:
+        referenced = set()
+        all_snapshots = f'{self.root}/snapshots'
+
+        if os.path.exists(all_snapshots):
+            for preset in os.listdir(all_snapshots):
+                for filename in os.listdir(f'{all_snapshots}/{preset}'):
+                    with open(f'{all_snapshots}/{preset}/{filename}') as file:
+                        for entry in json.load(file)['files'].values():
+                            referenced.update(entry['chunks'])
+
+        freed = 0
+
+        if not os.path.exists(self.chunks_dir):
+            return freed
+
+        for prefix in os.listdir(self.chunks_dir):
+            for digest in os.listdir(f'{self.chunks_dir}/{prefix}'):
+                if digest not in referenced:
+                    path = f'{self.chunks_dir}/{prefix}/{digest}'
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+
+        return freed
@@ -2,25 +2,42 @@ import calendar
 import datetime
 import logging
 import os
+import time
 from logging import WARNING, ERROR, CRITICAL
 
-import aiohttp
 import discord
-from discord import CheckFailure, Webhook
+from discord import CheckFailure
 from discord.ext.commands import MissingPermissions, CommandOnCooldown
 
 import config
 from abc import ABC
+from .admission import AdmissionController
+from .http_client import http_client
+from .images import ImageWarmer
+from .log_forwarder import LogForwarder
+from .metrics import COMMAND_SECONDS, MetricsServer
+from .prefix_index import PrefixIndex
+from .server_registry import ServerRegistry
 
 _intents = discord.Intents.default()
 _intents.message_content = True
 
+_critical_log: LogForwarder | None = None
+
 
 class SubclassedBot(discord.Bot, ABC):
     def __init__(self, *args, **options):
         super().__init__(*args, **options)
 
         self.config: config = config
+        self.servers = ServerRegistry()
+        self.preset_names = PrefixIndex()  # Filled in on startup, see main.py
+        self.images = ImageWarmer()  # Started once docker is connected, see main.py
+        self.admission = AdmissionController()
+        self.http_client = http_client  # Shared by every outbound request, closed in main.py
+        self.metrics = MetricsServer(self)  # Started in on_ready, if config.METRICS_PORT is set
+
+        self._command_started: dict[int, float] = {}
 
     def help_command(self) -> list[discord.Embed]:
         embed = discord.Embed()
@@ -84,9 +101,24 @@ class SubclassedBot(discord.Bot, ABC):
 
         return [embed, *group_embeds]
 
+    async def on_application_command(self, ctx: discord.ApplicationContext):
+        self._command_started[ctx.interaction.id] = time.perf_counter()
+
+    async def on_application_command_completion(self, ctx: discord.ApplicationContext):
+        self._observe_command(ctx, 'ok')
+
+    def _observe_command(self, ctx: discord.ApplicationContext, outcome: str):
+        started = self._command_started.pop(ctx.interaction.id, None)
+
+        if started is not None and ctx.command is not None:
+            COMMAND_SECONDS.labels(ctx.command.qualified_name, outcome).observe(time.perf_counter() - started)
+
     async def on_application_command_error(
             self, ctx: discord.ApplicationContext, error: discord.ApplicationCommandError
     ):
+        blocked = isinstance(error, (MissingPermissions, CommandOnCooldown, CheckFailure))
+        self._observe_command(ctx, 'blocked' if blocked else 'error')
+
         if isinstance(error, MissingPermissions):
             embed = discord.Embed(colour=discord.Colour.red(), title='⚠ Blocked!')
             embed.description = f"❌ You can't run this command!"
@@ -123,24 +155,46 @@ class SubclassedBot(discord.Bot, ABC):
         Message will be forwarded to local logging module + filesystem
         and also sent out via discord webhook if needed.
 
+        The webhook message is only queued, messages sent close together are grouped into one.
+
         :param level: level of log
         :param message: The message to be logged
         :return: None
         """
+        global _critical_log
 
         logging.log(
             level=level,
             msg=message
         )
 
-        content = f'`[{logging.getLevelName(level)}]` {message}'
+        if not os.getenv("LOGGING_WEBHOOK"):
+            return
+
+        if _critical_log is None:
+            _critical_log = LogForwarder(
+                os.getenv("LOGGING_WEBHOOK"), flush_interval=config.CRITICAL_LOG_FLUSH_INTERVAL, code_block=False
+            )
+            _critical_log.start()
 
-        async with aiohttp.ClientSession() as session:
-            webhook = Webhook.from_url(os.getenv("LOGGING_WEBHOOK"), session=session)
-            await webhook.send(content=content)
+        _critical_log.push(f'`[{logging.getLevelName(level)}]` {message}')
+
+    @staticmethod
+    async def close_critical_log():
+        """Send the critical logs still queued, see `send_critical_log`."""
+        global _critical_log
+
+        if _critical_log is not None:
+            await _critical_log.close()
+            _critical_log = None
 
     async def on_ready(self):
         print(f"✔ Bot is ready, logged in as {self.user}")
 
+        try:
+            await self.metrics.start()
+        except OSError as e:
+            print(f"❌ Couldn't start the metrics endpoint: {e}")
+
 
 bot_instance = SubclassedBot(intents=_intents)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+import config
+import src
+
+_LABEL = config.CONTAINER_LABEL
+_CONFIG_LABEL = f'{config.CONTAINER_LABEL}.config'
+
+# Env vars that change on every start without changing the container, they don't count towards its config.
+_VOLATILE_ENV = ('RCON_PASSWORD',)
+
+
+def config_hash(**run_kwargs) -> str:
+    """Hash of everything that goes into `containers.run`, except the volatile env vars."""
+    run_kwargs['environment'] = sorted(
+        x for x in run_kwargs.get('environment', []) if x.split('=', 1)[0] not in _VOLATILE_ENV
+    )
+    return hashlib.sha256(json.dumps(run_kwargs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class ContainerManager:
+    """
+    Lifecycle of the bot's own containers.
+
+    Every container the bot creates is labeled, only labeled containers are ever removed.
+    With `config.REUSE_CONTAINERS` a preset's container is kept after it stops, and started again instead of
+    recreated if it was created with the same image, env, ports, volumes and memory limit. The image is
+    compared by ID, so once a tag is pulled again kept containers of the old image are recreated.
+    """
+
+    async def start(self, name: str, **run_kwargs):
+        """Start the preset's container, returns it and whether an existing one was reused."""
+        digest = config_hash(**run_kwargs)
+        existing = await src.docker_backend.get_container(name)
+
+        if existing is not None and _LABEL in existing.labels:
+            reusable = (
+                config.REUSE_CONTAINERS and existing.labels.get(_CONFIG_LABEL) == digest
+                and existing.status != 'running'
+            )
+
+            # The tag may have been pulled again since, see ImageWarmer.
+            image = await src.docker_backend.resolve_image(run_kwargs['image']) if reusable else None
+
+            if reusable and src.docker_backend.image_id(existing) == image:
+                await src.docker_backend.start_container(existing)
+                return existing, True
+
+            await src.docker_backend.remove_container(existing, force=True)
+
+        container = await src.docker_backend.run_container(
+            name=name, labels={_LABEL: name, _CONFIG_LABEL: digest}, detach=True, **run_kwargs
+        )
+
+        return container, False
+
+    async def stop(self, container, timeout: int = None):
+        await src.docker_backend.stop_container(container, timeout)
+
+        if not config.REUSE_CONTAINERS:
+            await src.docker_backend.remove_container(container)
+
+    async def remove(self, name: str):
+        """Remove the preset's container, if it's one of ours."""
+        existing = await src.docker_backend.get_container(name)
+
+        if existing is not None and _LABEL in existing.labels:
+            await src.docker_backend.remove_container(existing, force=True)
+
+    async def running(self) -> list:
+        return await src.docker_backend.list_containers(filters={'label': _LABEL})
+
+    async def remove_stale(self, keep: set[str]):
+        """Remove stopped containers of presets not in `keep` (deleted presets)."""
+        for container in await src.docker_backend.list_containers(all=True, filters={'label': _LABEL}):
+            if container.status != 'running' and container.labels.get(_LABEL) not in keep:
+                await src.docker_backend.remove_container(container)
+
+
+containers = ContainerManager()
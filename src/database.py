@@ -12,4 +12,12 @@ async def db_init():
     print("✔ Database initialised!")
     logging.info("Database initialised!")
 
-    await Tortoise.generate_schemas(safe=True)
+    # Generating schemas on every boot is wasted work, only do it when a model's table is missing.
+    _, rows = await Tortoise.get_connection('default').execute_query(
+        "SELECT name FROM sqlite_master WHERE type='table'"
+    )
+    existing = {row['name'] for row in rows}
+    required = {model._meta.db_table for model in Tortoise.apps['models'].values()}
+
+    if required - existing:
+        await Tortoise.generate_schemas(safe=True)
@@ -0,0 +1,316 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable
+
+import config
+from .metrics import DOCKER_CALL_SECONDS
+
+ExecResult = namedtuple('ExecResult', 'exit_code,output')
+
+
+class DockerBackend:
+    """
+    Async adapter around docker-py.
+
+    docker-py only has blocking calls, so every call is made on a small dedicated thread pool
+    and awaited from the bot's loop. Log streams get a thread of their own, since they block
+    for as long as the container is running.
+
+    The docker client and the thread pool are only created by `connect()` or on first use, not on import
+    (config isn't fully loaded yet when `src` is imported).
+    """
+
+    def __init__(self, client_factory: Callable):
+        self._client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.DOCKER_WORKERS, thread_name_prefix='docker'
+            )
+
+        return self._executor
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+
+        return self._client
+
+    async def connect(self):
+        """Create the client and make sure the daemon answers."""
+        def ping():
+            return self.client.ping()
+
+        await self._call(ping)
+
+    async def _call(self, func: Callable, *args, **kwargs):
+        # Timed per docker-py method, e.g. "Container.stop" or "ContainerCollection.run".
+        name = getattr(func, '__qualname__', 'call').rpartition('<locals>.')[2]
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        outcome = 'error'
+
+        try:
+            result = await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+            outcome = 'ok'
+            return result
+        finally:
+            DOCKER_CALL_SECONDS.labels(name, outcome).observe(time.perf_counter() - started)
+
+    async def run_container(self, **kwargs):
+        return await self._call(self.client.containers.run, **kwargs)
+
+    async def list_containers(self, **kwargs) -> list:
+        return await self._call(self.client.containers.list, **kwargs)
+
+    async def get_container(self, name: str):
+        """Container (in any state) by name, None if there is none."""
+        import docker.errors
+
+        try:
+            return await self._call(self.client.containers.get, name)
+        except docker.errors.NotFound:
+            return None
+
+    async def start_container(self, container):
+        await self._call(container.start)
+
+    async def remove_container(self, container, force: bool = False):
+        # v=True also removes the container's anonymous volumes, which prune used to clean up.
+        await self._call(container.remove, v=True, force=force)
+
+    @staticmethod
+    def container_env(container) -> dict[str, str]:
+        env = container.attrs.get('Config', {}).get('Env') or []
+        return dict(x.split('=', 1) for x in env if '=' in x)
+
+    @staticmethod
+    def image_id(container) -> str:
+        return container.attrs.get('Image', '')
+
+    async def exec_run(self, container, cmd: list[str], user: str = '') -> ExecResult:
+        exit_code, output = await self._call(container.exec_run, cmd, user=user)
+        return ExecResult(exit_code, output)
+
+    async def stop_container(self, container, timeout: int = None):
+        kwargs = {} if timeout is None else {'timeout': timeout}
+        await self._call(container.stop, **kwargs)
+
+    async def status(self, container) -> str:
+        """Current state of the container, like 'running' or 'exited'."""
+        await self._call(container.reload)
+        return container.status
+
+    async def host_port(self, container, port: str) -> int | None:
+        """Host port docker bound `port` (like '25575/tcp') of the container to."""
+        await self._call(container.reload)
+        bindings = (container.ports or {}).get(port)
+
+        return int(bindings[0]['HostPort']) if bindings else None
+
+    async def image_exists(self, image: str) -> bool:
+        import docker.errors
+
+        try:
+            await self._call(self.client.images.get, image)
+            return True
+        except docker.errors.ImageNotFound:
+            return False
+
+    async def resolve_image(self, image: str) -> str | None:
+        """ID of the image a tag currently points to, None if it isn't pulled."""
+        import docker.errors
+
+        try:
+            return (await self._call(self.client.images.get, image)).id
+        except docker.errors.ImageNotFound:
+            return None
+
+    async def pull_image(self, image: str):
+        repository, tag = image.rsplit(':', 1)
+        await self._call(self.client.images.pull, repository, tag=tag)
+
+    async def stats(self, container) -> dict:
+        # CPU is computed between our own samples, precpu_stats isn't used.
+        return await self._call(container.stats, stream=False)
+
+    async def logs(self, container, since: float = None) -> AsyncIterator[str]:
+        """
+        Yields decoded log lines until the container stops or the consumer stops iterating.
+
+        Only lines logged after `since` (unix time) are read, a started again container still has the
+        log of its previous runs. Without it, nothing older than now is read.
+        """
+        since = since if since is not None else time.time()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+        stop = threading.Event()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # Loop is already closed.
+                stop.set()
+
+        def reader():
+            try:
+                for chunk in container.logs(stream=True, follow=True, since=since):
+                    if stop.is_set():
+                        break
+
+                    put(chunk)
+            finally:
+                put(None)
+
+        threading.Thread(target=reader, name=f'docker-logs-{container.name}', daemon=True).start()
+
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk.decode('utf-8', errors='replace').rstrip('\n')
+        finally:
+            stop.set()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        if self._client is not None:
+            self._client.close()
+
+
+class FakeContainer:
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, image: str, **kwargs):
+        self.id = f'fake{next(self._ids):060d}'
+        self.name = name
+        self.image = image
+        self.status = 'running'
+        self.attrs = kwargs
+        self.labels: dict = kwargs.get('labels') or {}
+
+        self.commands: list[list[str]] = []
+        self.host_ports: dict[str, int] = {}
+        self.stats: dict = {
+            'cpu_stats': {'cpu_usage': {'total_usage': 0}, 'system_cpu_usage': 0, 'online_cpus': 1},
+            'memory_stats': {'usage': 0, 'stats': {}},
+            'networks': {},
+            'blkio_stats': {'io_service_bytes_recursive': []},
+        }
+        self._logs: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def emit(self, line: str):
+        """Write a line to the container's log, as if the server printed it."""
+        self._logs.put_nowait(line)
+
+    def __repr__(self):
+        return f'FakeContainer({self.name=}, {self.status=})'
+
+
+class FakeDockerBackend:
+    """
+    In-memory stand-in for `DockerBackend`, no docker daemon needed.
+
+    Containers "run" until stopped, commands sent via `exec_run` are recorded on the container and
+    answered by `exec_handler`, and log lines are fed in with `FakeContainer.emit`.
+    """
+
+    def __init__(
+            self, exec_handler: Callable[[FakeContainer, list[str]], ExecResult] = None,
+            host_ports: dict[str, int] = None
+    ):
+        self.containers: dict[str, FakeContainer] = {}
+        self.images: set[str] = set()
+        self.exec_handler = exec_handler or (lambda container, cmd: ExecResult(0, b''))
+        self.host_ports = host_ports or {}  # Given to every new container, e.g. to point RCON at a FakeRconServer.
+
+    async def run_container(self, *, name: str, image: str, **kwargs) -> FakeContainer:
+        existing = self.containers.get(name)
+        if existing is not None:
+            raise RuntimeError(f'Conflict. The container name "/{name}" is already in use')
+
+        container = FakeContainer(name, image, **kwargs)
+        container.host_ports.update(self.host_ports)
+        self.containers[name] = container
+        return container
+
+    async def list_containers(self, all: bool = False, filters: dict = None, **kwargs) -> list[FakeContainer]:  # noqa
+        label = (filters or {}).get('label')
+        key, _, value = (label or '').partition('=')
+
+        def labeled(container: FakeContainer) -> bool:
+            return not key or key in container.labels and (not value or container.labels[key] == value)
+
+        return [x for x in self.containers.values() if (all or x.status == 'running') and labeled(x)]
+
+    async def get_container(self, name: str) -> FakeContainer | None:
+        return self.containers.get(name)
+
+    async def start_container(self, container: FakeContainer):
+        container.status = 'running'
+        container._logs = asyncio.Queue()  # noqa
+
+    async def remove_container(self, container: FakeContainer, force: bool = False):
+        if container.status == 'running' and not force:
+            raise RuntimeError(f'You cannot remove a running container {container.id}')
+
+        await self.stop_container(container)
+        self.containers.pop(container.name, None)
+
+    @staticmethod
+    def image_id(container: FakeContainer) -> str:
+        return container.image
+
+    @staticmethod
+    def container_env(container: FakeContainer) -> dict[str, str]:
+        return dict(x.split('=', 1) for x in container.attrs.get('environment') or [] if '=' in x)
+
+    async def exec_run(self, container: FakeContainer, cmd: list[str], user: str = '') -> ExecResult:
+        container.commands.append(cmd)
+        return self.exec_handler(container, cmd)
+
+    async def stop_container(self, container: FakeContainer, timeout: int = None):
+        if container.status == 'running':
+            container.status = 'exited'
+            container.emit(None)  # noqa, ends the log stream
+
+    async def image_exists(self, image: str) -> bool:
+        return image in self.images
+
+    async def resolve_image(self, image: str) -> str | None:
+        return image  # Fake containers are identified by tag, see image_id().
+
+    async def pull_image(self, image: str):
+        self.images.add(image)
+
+    async def status(self, container: FakeContainer) -> str:
+        return container.status
+
+    async def host_port(self, container: FakeContainer, port: str) -> int | None:
+        return container.host_ports.get(port)
+
+    async def stats(self, container: FakeContainer) -> dict:
+        return container.stats
+
+    async def connect(self):
+        pass
+
+    async def logs(self, container: FakeContainer, since: float = None) -> AsyncIterator[str]:
+        while (line := await container._logs.get()) is not None:  # noqa
+            yield line
+
+    def close(self):
+        pass
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import aiofiles
+import aiohttp
+
+import config
+from .exceptions import DownloadFailed, DownloadTooLarge
+
+_RETRYABLE = (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError, asyncio.TimeoutError)
+
+
+async def download_file(
+        session: aiohttp.ClientSession, url: str, path: str, max_size: int = None,
+        on_progress: Callable[[int, int | None], Awaitable] = None
+) -> int:
+    """
+    Stream `url` to `path` chunk by chunk, so the file never has to fit in memory.
+
+    Content-Length is checked before anything is written, and the transfer is aborted once more
+    than `max_size` bytes arrive. If the connection drops and the origin accepts byte ranges,
+    the transfer is resumed where it stopped, up to `config.DOWNLOAD_RETRIES` times.
+
+    `on_progress(written, total)` is awaited at most every `config.DOWNLOAD_PROGRESS_INTERVAL` seconds.
+
+    :return: Amount of bytes written.
+    """
+    if max_size is None:
+        max_size = config.WORLD_UPLOAD_MAX_SIZE
+
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+    written = 0
+    total = None
+    resumable = False
+    last_progress = time.monotonic()
+
+    for attempt in range(config.DOWNLOAD_RETRIES + 1):
+        headers = {'Range': f'bytes={written}-'} if written and resumable else {}
+
+        try:
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status == 206 and headers:
+                    mode = 'ab'
+                elif response.status == 200:
+                    mode = 'wb'
+                    written = 0
+                    total = response.content_length
+                else:
+                    raise DownloadFailed(f'Got {response.status}, make sure you provide a valid url.')
+
+                if total is not None and total > max_size:
+                    raise DownloadTooLarge(total, max_size)
+
+                resumable = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+                async with aiofiles.open(path, mode) as file:
+                    async for chunk in response.content.iter_chunked(config.DOWNLOAD_CHUNK_SIZE):
+                        written += len(chunk)
+
+                        if written > max_size:
+                            raise DownloadTooLarge(written, max_size)
+
+                        await file.write(chunk)
+
+                        if on_progress is not None and \
+                                time.monotonic() - last_progress >= config.DOWNLOAD_PROGRESS_INTERVAL:
+                            last_progress = time.monotonic()
+                            await on_progress(written, total)
+
+                if total is not None and written < total:
+                    raise aiohttp.ClientPayloadError(f'Connection closed at {written}/{total} bytes')
+
+                return written
+
+        except _RETRYABLE as e:
+            if attempt == config.DOWNLOAD_RETRIES:
+                raise DownloadFailed(f'Download interrupted: {e}') from e
+
+            print(f'❌ Download of {url} interrupted at {written} bytes, retrying ({e})')
+            await asyncio.sleep(2 ** attempt)
+
+        except aiohttp.ClientError as e:
+            raise DownloadFailed(f"Couldn't download file: {e}") from e
@@ -1,2 +1,29 @@
 class AlreadyRunning(Exception):
     pass
+
+
+class DownloadFailed(Exception):
+    pass
+
+
+class DownloadTooLarge(DownloadFailed):
+    def __init__(self, size: int, max_size: int):
+        self.size = size
+        self.max_size = max_size
+        super().__init__(f'File is too big, maximum size is {max_size / 1024 ** 2:.0f} MB.')
+
+
+class RconError(Exception):
+    pass
+
+
+class RconUnavailable(RconError):
+    """Connecting or logging in failed, so the command was never sent."""
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class AdmissionCancelled(Exception):
+    """The start was taken out of the admission queue before it was admitted."""
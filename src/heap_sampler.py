@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+import time
+
+import config
+import src
+from .jvm import parse_heap_info
+from .models import HeapSample
+
+# The server is the only JVM in its container. It's found through /proc rather than jps, Aikar's flags turn off
+# the perf data jps and jstat read. jcmd has to run as the user the server runs as (uid 1000 in the itzg image).
+_HEAP_INFO = [
+    'sh', '-c',
+    'for p in /proc/[0-9]*; do '
+    'if [ "$(cat $p/comm 2>/dev/null)" = java ]; then exec jcmd ${p#/proc/} GC.heap_info; fi; '
+    'done; echo "no java process found"; exit 1'
+]
+_SERVER_USER = '1000'
+
+
+class HeapSampler:
+    """
+    Records heap usage of every ready server every `config.HEAP_SAMPLE_INTERVAL` seconds, for memory sizing.
+    Why a server can't be sampled is kept in its preset's `heap_sampling_error`.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+
+            try:
+                await self.sample()
+            except Exception as e:
+                print(f'❌ Heap sampling failed: {e}')
+
+            await asyncio.sleep(max(config.HEAP_SAMPLE_INTERVAL - (time.monotonic() - started), 0))
+
+    async def sample(self):
+        sessions = [x for x in self.bot.servers if x.container is not None and x.preset.ready.is_set()]
+
+        results = await asyncio.gather(
+            *(src.docker_backend.exec_run(x.container, _HEAP_INFO, user=_SERVER_USER) for x in sessions),
+            return_exceptions=True
+        )
+
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=config.HEAP_SAMPLE_RETENTION)
+
+        for session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                self._unavailable(session.preset, str(result))
+                continue
+
+            output = result.output.decode('utf-8', errors='replace')
+            heap = parse_heap_info(output) if result.exit_code == 0 else None
+
+            if heap is None:
+                self._unavailable(session.preset, output.strip().splitlines()[-1] if output.strip() else 'no output')
+                continue
+
+            session.preset.heap_sampling_error = None
+            await HeapSample.create(preset=session.name, **heap)
+            await HeapSample.filter(preset=session.name, timestamp__lt=cutoff).delete()
+
+    @staticmethod
+    def _unavailable(preset, reason: str):
+        if preset.heap_sampling_error is None:
+            print(f"❌ Can't sample the heap of {preset.name}: {reason}")
+
+        preset.heap_sampling_error = reason
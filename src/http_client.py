@@ -0,0 +1,40 @@
+import aiohttp
+
+import config
+
+
+class HttpClient:
+    """
+    The one HTTP session every outbound request of the bot goes through (log webhooks, critical logs,
+    world uploads, the file server probe), so connections, DNS lookups and TLS sessions are reused.
+
+    The session is created by `start()` or on first use, it has to be made on the bot's loop.
+    """
+
+    def __init__(self):
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_POOL_SIZE,
+                limit_per_host=config.HTTP_POOL_PER_HOST,
+                ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=config.HTTP_KEEPALIVE,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+
+        return self._session
+
+    def start(self):
+        return self.session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+        self._session = None
+
+
+http_client = HttpClient()
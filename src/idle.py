@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+import config
+from .log_events import LogEvent, bus
+from .server_registry import ServerSession
+from .sleep_proxy import SleepProxy
+from .versions import Versions
+
+
+class IdleManager:
+    """
+    Puts servers nobody is playing on to sleep, and wakes them up when someone joins.
+
+    Players are counted from join/leave console lines. Once a server has been empty for `config.IDLE_TIMEOUT`
+    seconds its container is stopped, freeing its memory, and a `SleepProxy` takes over its port until a player
+    tries to join. The session stays in the registry meanwhile, so the port and console channel stay reserved.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.players: dict[str, set[str]] = {}
+        self.idle_since: dict[str, float] = {}  # Only servers that are ready and empty
+
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if config.IDLE_TIMEOUT and self._task is None:
+            bus.subscribe(self._on_event, ['ready', 'join', 'leave'])
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            bus.unsubscribe(self._on_event)
+            self._task.cancel()
+            self._task = None
+
+    def _on_event(self, preset_name: str, event: LogEvent):
+        players = self.players.setdefault(preset_name, set())
+
+        if event.category == 'ready':
+            players.clear()
+            self.idle_since[preset_name] = time.monotonic()
+            return
+
+        if event.category == 'join':
+            players.add(event.fields['player'])
+        else:
+            players.discard(event.fields['player'])
+
+        if players:
+            self.idle_since.pop(preset_name, None)
+        else:
+            self.idle_since.setdefault(preset_name, time.monotonic())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(config.IDLE_CHECK_INTERVAL)
+            now = time.monotonic()
+
+            for session in self.bot.servers:
+                since = self.idle_since.get(session.name)
+
+                # Left over from before a restart, until the server is ready again.
+                if session.container is None or not session.preset.ready.is_set():
+                    continue
+
+                if since is None or now - since < config.IDLE_TIMEOUT:
+                    continue
+
+                try:
+                    await self.sleep(session)
+                except Exception as e:
+                    print(f"❌ Couldn't put {session.name} to sleep: {e}")
+
+    async def _notify(self, session: ServerSession, content: str) -> discord.Message | None:
+        channel = self.bot.get_channel(session.console_channel)
+
+        if channel is None:
+            return None
+
+        try:
+            return await channel.send(content)
+        except discord.HTTPException:
+            return None
+
+    async def sleep(self, session: ServerSession):
+        self.idle_since.pop(session.name, None)
+        self.players.pop(session.name, None)
+
+        preset = session.preset
+        await preset.shutdown_logic(0)
+        self.bot.admission.release(session.name)
+
+        proxy = SleepProxy(
+            config.IP, preset.port, config.SLEEP_MOTD, preset.version, lambda player: self._wake_for(session, player)
+        )
+
+        # Docker may take a moment to let go of the port.
+        for attempt in range(5):
+            try:
+                await proxy.start()
+                break
+            except OSError:
+                if attempt == 4:
+                    raise
+                await asyncio.sleep(1)
+
+        session.proxy = proxy
+        print(f'💤 {session.name} is sleeping')
+
+        await self._notify(
+            session,
+            f"💤 `{session.name}` is sleeping, nobody was online for {config.IDLE_TIMEOUT / 60:.0f} minute(s). "
+            f"Joining the server (or `/start`) wakes it up."
+        )
+
+    async def _wake_for(self, session: ServerSession, player: str):
+        """Wake up for a joining player. The proxy runs this as a task nobody awaits, failures are reported here."""
+        try:
+            await self.wake(session, player)
+        except Exception as e:
+            print(f"❌ Couldn't wake {session.name} up for {player}: {e}")
+            await self.bot.send_critical_log(f"Couldn't wake `{session.name}` up for `{player}`: {e}", logging.ERROR)
+
+    async def wake(self, session: ServerSession, reason: str):
+        """Start a sleeping server again, `reason` is who or what woke it up."""
+        if session.proxy is None:
+            return
+
+        await session.proxy.close()
+        session.proxy = None
+
+        if self.bot.servers.get(session.name) is not session:
+            return  # Stopped while it was sleeping.
+
+        print(f'☀ Waking {session.name} up ({reason})')
+
+        channel = self.bot.get_channel(session.console_channel)
+        message = await self._notify(session, f"☀ Waking `{session.name}` up, `{reason}` wants to play...")
+
+        try:
+            java_version = Versions.get_by_version(session.preset.version).value.flag.java_version
+            _, _, memory_limit = await session.preset.jvm_settings(java_version)
+
+            # Waits its turn like any other start if the host filled up while it was sleeping.
+            await self.bot.admission.wait(self.bot.admission.request(session.name, memory_limit))
+            await session.preset.run_server(logging=channel is not None, logging_channel=channel)
+        except Exception as e:
+            self.bot.servers.remove(session.name)
+            self.bot.admission.release(session.name)
+            await self._notify(session, f"❌ Couldn't wake `{session.name}` up: `{e or 'stopped'}`")
+            raise
+
+        seconds = await session.preset.wait_until_ready()
+
+        if message is not None and seconds is not None:
+            await message.edit(content=f"✅ `{session.name}` is awake, ready in `{seconds:.1f}s`.")
@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import time
+
+import config
+import src
+from .versions import Versions
+
+
+def image_name(java_version: str) -> str:
+    return f'{config.DOCKER_IMAGE}:{java_version}'
+
+
+def required_images() -> list[str]:
+    """Every image a preset can run on, one per java flag used in `Versions`."""
+    return sorted({image_name(x.value.flag.java_version) for x in Versions})
+
+
+class ImageStatus:
+    def __init__(self, state: str = 'unknown'):
+        self.state = state  # unknown, pulling, ready, failed
+        self.updated_at: float = time.time()
+        self.error: str | None = None
+
+    def set(self, state: str, error: str = None):
+        self.state = state
+        self.error = error
+        self.updated_at = time.time()
+
+
+class ImageWarmer:
+    """
+    Pre-pulls the server images, so `/start` doesn't have to, and re-pulls them once a day
+    during `config.IMAGE_REFRESH_HOURS` to pick up image updates while nobody is playing.
+
+    Config is only read in `start()`, the warmer is created while `src` (and so config) is still being imported.
+    """
+
+    def __init__(self):
+        self.status: dict[str, ImageStatus] = {}
+        self._task: asyncio.Task | None = None
+        self._last_refresh: datetime.date | None = None
+        self._pull_lock: asyncio.Semaphore | None = None
+
+    def start(self):
+        if not self.status:
+            self.status = {x: ImageStatus() for x in required_images()}
+
+        if self._pull_lock is None:
+            self._pull_lock = asyncio.Semaphore(config.IMAGE_PULL_CONCURRENCY)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def is_ready(self, image: str) -> bool:
+        status = self.status.get(image)
+        return status is not None and status.state == 'ready'
+
+    async def warm(self, refresh: bool = False):
+        """Pull every image that's missing, or all of them if `refresh` is set."""
+        await asyncio.gather(*(self._warm_image(x, refresh) for x in self.status))
+
+    async def _warm_image(self, image: str, refresh: bool):
+        status = self.status[image]
+
+        if status.state == 'pulling':
+            return
+
+        try:
+            if not refresh and await src.docker_backend.image_exists(image):
+                status.set('ready')
+                return
+
+            async with self._pull_lock:
+                status.set('pulling')
+                started = time.perf_counter()
+
+                await src.docker_backend.pull_image(image)
+
+                status.set('ready')
+                print(f'☑ Pulled {image} in {time.perf_counter() - started:.1f}s')
+        except Exception as e:
+            # A failed refresh keeps the old image usable.
+            status.set('ready' if refresh and await self._exists(image) else 'failed', str(e))
+            print(f"❌ Couldn't pull {image}: {e}")
+
+    @staticmethod
+    async def _exists(image: str) -> bool:
+        try:
+            return await src.docker_backend.image_exists(image)
+        except Exception:
+            return False
+
+    def _in_quiet_hours(self) -> bool:
+        now = datetime.datetime.now()
+        start, end = config.IMAGE_REFRESH_HOURS
+
+        return start <= now.hour < end and self._last_refresh != now.date()
+
+    async def _run(self):
+        await self.warm()
+
+        while True:
+            await asyncio.sleep(config.IMAGE_REFRESH_CHECK_INTERVAL)
+
+            if self._in_quiet_hours():
+                self._last_refresh = datetime.date.today()
+                await self.warm(refresh=True)
+            elif any(x.state != 'ready' for x in self.status.values()):
+                await self.warm()
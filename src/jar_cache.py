@@ -0,0 +1,175 @@
+import errno
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+
+import config
+
+
+class JarCache:
+    """
+    Server jars and libraries shared between presets.
+
+    After a server stops, its server jar and the files under `config.SHARED_CACHE_DIRECTORIES` are moved into
+    a content-addressed object store and hardlinked back, and the version/server type index records them.
+    Before a preset starts, whatever its version/server type index lists is hardlinked into its data
+    directory, so the server finds its jar and libraries already there and skips the download.
+
+    Every link is the same file, a server that rewrites one in place changes it for all presets. The index keeps
+    the size and modification time of every object, an object that doesn't match them anymore isn't linked again
+    and is replaced by a fresh copy on the next capture.
+
+    All methods are blocking, call them with `asyncio.to_thread`.
+    """
+
+    def __init__(self, root: str = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return (self._root or config.SHARED_CACHE_PATH).replace("\\", "/")
+
+    def _object_path(self, digest: str) -> str:
+        return f'{self.root}/objects/{digest[:2]}/{digest}'
+
+    def _index_path(self, version: str, server_type: str) -> str:
+        return f'{self.root}/index/{version}-{server_type}.json'
+
+    def _load_index(self, version: str, server_type: str) -> dict[str, dict]:
+        """Relative path: {digest, size, mtime} of the object it's linked to."""
+        path = self._index_path(version, server_type)
+
+        if not os.path.exists(path):
+            return {}
+
+        with open(path) as file:
+            index = json.load(file)
+
+        # Entries without the object's size and modification time can't be verified, they're captured again.
+        return {relative: entry for relative, entry in index.items() if isinstance(entry, dict)}
+
+    def _save_index(self, version: str, server_type: str, index: dict[str, dict]):
+        path = self._index_path(version, server_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(index, file)
+        os.replace(f'{path}.tmp', path)
+
+    @staticmethod
+    def _link(source: str, destination: str):
+        """Hardlink `source` to `destination` (replacing it), copy if they're on different filesystems."""
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp = f'{destination}.link'
+
+        try:
+            os.link(source, temp)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            shutil.copy2(source, temp)
+
+        os.replace(temp, destination)
+
+    def _intact(self, entry: dict) -> bool:
+        """Whether the object is still what was stored, nothing rewrote it through one of its links."""
+        try:
+            result = os.stat(self._object_path(entry['digest']))
+        except OSError:
+            return False
+
+        return result.st_size == entry['size'] and result.st_mtime_ns == entry['mtime']
+
+    def _discard(self, entry: dict):
+        try:
+            os.remove(self._object_path(entry['digest']))
+        except FileNotFoundError:
+            pass
+
+    def _store(self, path: str) -> dict:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+
+        digest = digest.hexdigest()
+        object_path = self._object_path(digest)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            shutil.copy2(path, f'{object_path}.tmp')
+            os.replace(f'{object_path}.tmp', object_path)
+
+        if not os.path.samefile(path, object_path):
+            self._link(object_path, path)
+
+        result = os.stat(object_path)
+        return {'digest': digest, 'size': result.st_size, 'mtime': result.st_mtime_ns}
+
+    @staticmethod
+    def _shareable(volume: str):
+        """Relative paths of the server jar(s) and the files in the shared directories, nothing else is visited."""
+        try:
+            with os.scandir(volume) as entries:
+                for entry in entries:
+                    if entry.is_file() and fnmatch.fnmatchcase(entry.name, config.SHARED_CACHE_JARS):
+                        yield entry.name
+        except FileNotFoundError:
+            return
+
+        for directory in config.SHARED_CACHE_DIRECTORIES:
+            for root, _, filenames in os.walk(f'{volume}/{directory}'):
+                for filename in filenames:
+                    yield os.path.relpath(os.path.join(root, filename), volume).replace("\\", "/")
+
+    def populate(self, preset_name: str, version: str, server_type: str) -> int:
+        """Link cached files of the version/server type into the preset's data directory, returns how many."""
+        volume = f'{config.DOCKER_VOLUME_PATH}/{preset_name}'
+        linked = 0
+
+        for relative, entry in self._load_index(version, server_type).items():
+            destination = f'{volume}/{relative}'
+
+            if os.path.exists(destination) or not self._intact(entry):
+                continue
+
+            self._link(self._object_path(entry['digest']), destination)
+            linked += 1
+
+        return linked
+
+    def capture(self, preset_name: str, version: str, server_type: str) -> int:
+        """Move shareable files of a stopped server into the cache, returns how many were indexed."""
+        volume = f'{config.DOCKER_VOLUME_PATH}/{preset_name}'
+        index = self._load_index(version, server_type)
+        indexed = 0
+
+        for relative in self._shareable(volume):
+            path = f'{volume}/{relative}'
+            entry = index.get(relative)
+
+            if entry is not None:
+                try:
+                    linked = os.path.samefile(path, self._object_path(entry['digest']))
+                except OSError:
+                    linked = False
+
+                if linked and self._intact(entry):
+                    continue
+
+                if linked:
+                    # Rewritten in place, the object doesn't hold what its digest says anymore.
+                    self._discard(entry)
+
+            index[relative] = self._store(path)
+            indexed += 1
+
+        if indexed:
+            self._save_index(version, server_type, index)
+
+        return indexed
+
+
+jar_cache = JarCache()
@@ -0,0 +1,139 @@
+import math
+import re
+from collections import namedtuple
+
+JvmProfile = namedtuple('JvmProfile', 'name,description,java_versions,env,heap_ratio')
+
+_G1_BASE = '-XX:+UseG1GC -XX:+ParallelRefProcEnabled -XX:+DisableExplicitGC -XX:+AlwaysPreTouch'
+
+# `env` goes to the itzg image as is, `heap_ratio` is the part of the container's memory given to the heap,
+# the rest is left for metaspace, thread stacks, direct buffers and the JIT.
+PROFILES: dict[str, JvmProfile] = {
+    'default': JvmProfile(
+        'default', "The image's defaults.", None, [], 0.75
+    ),
+    'aikar': JvmProfile(
+        'aikar', "G1 with Aikar's flags, short pauses for most servers.", None, ['USE_AIKAR_FLAGS=true'], 0.75
+    ),
+    'zgc': JvmProfile(
+        'zgc', 'ZGC, sub-millisecond pauses for big heaps, needs more memory outside the heap.',
+        {'java17-jdk'}, ['JVM_XX_OPTS=-XX:+UseZGC -XX:+AlwaysPreTouch -XX:+DisableExplicitGC'], 0.65
+    ),
+    'small-heap': JvmProfile(
+        'small-heap', 'G1 tuned for heaps under 2 GB on Java 8, with bounded metaspace.',
+        {'java8-jdk'},
+        [f'JVM_XX_OPTS={_G1_BASE} -XX:MaxGCPauseMillis=50 -XX:G1HeapRegionSize=1M -XX:MaxMetaspaceSize=256m'],
+        0.7
+    ),
+}
+
+Recommendation = namedtuple('Recommendation', 'heap,limit,live,peak,rss,gc_percent,samples')
+
+_STEP = 256  # MB, sizes are rounded up to this
+
+
+def _round_up(value: float) -> int:
+    return int(math.ceil(value / _STEP) * _STEP)
+
+
+def supports(profile: JvmProfile, java_version: str) -> bool:
+    return profile.java_versions is None or java_version in profile.java_versions
+
+
+_SIZE = r'(\d+)([KMG])'
+_UNITS = {'K': 1 / 1024, 'M': 1, 'G': 1024}
+
+# `jcmd <pid> GC.heap_info` prints a different summary for every collector.
+_G1_HEAP = re.compile(rf'garbage-first heap\s+total {_SIZE}, used {_SIZE}')
+_G1_YOUNG = re.compile(rf'region size \d+[KMG], \d+ young \({_SIZE}\)')
+_GENERATION = re.compile(
+    rf'(PSYoungGen|def new generation|ParOldGen|tenured generation)\s+total {_SIZE}, used {_SIZE}'
+)
+_ZGC_HEAP = re.compile(rf'ZHeap\s+used {_SIZE}, capacity {_SIZE}')
+_SHENANDOAH_HEAP = re.compile(rf'{_SIZE} committed, {_SIZE} used')
+
+
+def _mb(value: str, unit: str) -> float:
+    return int(value) * _UNITS[unit]
+
+
+def parse_heap_info(output: str) -> dict[str, float] | None:
+    """
+    Heap usage in MB from `jcmd <pid> GC.heap_info` output, None if the collector's summary isn't recognized.
+
+    G1's old generation is what isn't in young regions, collectors without generations (ZGC, Shenandoah)
+    report their whole heap as old. The heap report has no GC time, `gc_time` is None.
+    """
+    if match := _G1_HEAP.search(output):
+        committed, used = _mb(*match.group(1, 2)), _mb(*match.group(3, 4))
+        young = _G1_YOUNG.search(output)
+        old_used = max(used - _mb(*young.group(1, 2)), 0.0) if young else used
+
+    elif generations := _GENERATION.findall(output):
+        committed = sum(_mb(x[1], x[2]) for x in generations)
+        used = sum(_mb(x[3], x[4]) for x in generations)
+        old_used = sum(_mb(x[3], x[4]) for x in generations if x[0] in ('ParOldGen', 'tenured generation'))
+
+    elif match := _ZGC_HEAP.search(output):
+        used, committed = _mb(*match.group(1, 2)), _mb(*match.group(3, 4))
+        old_used = used
+
+    elif match := _SHENANDOAH_HEAP.search(output):
+        committed, used = _mb(*match.group(1, 2)), _mb(*match.group(3, 4))
+        old_used = used
+
+    else:
+        return None
+
+    return {'used': used, 'committed': committed, 'old_used': old_used, 'gc_time': None}
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def recommend(
+        samples: list[tuple[float, float, float, float, float | None]], rss_max: float | None, profile: JvmProfile,
+        min_samples: int
+) -> Recommendation | None:
+    """
+    Heap size and container limit (MB) from observed heap usage.
+
+    `samples` are (unix time, heap used, heap committed, old generation used, total GC seconds), oldest first.
+    GC seconds are None when the server's heap report doesn't have them, `gc_percent` is None if none do.
+    The old generation (what's still alive after collections, roughly) gets 1.5x its size as headroom, the
+    container gets whatever the server used outside its heap on top, or the profile's share if that's unknown.
+    """
+    if len(samples) < min_samples:
+        return None
+
+    live = _percentile([x[3] for x in samples], 0.95)
+    peak = max(x[1] for x in samples)
+    committed = max(x[2] for x in samples)
+
+    heap = _round_up(max(live * 2.5, 512))
+
+    overhead = heap * (1 - profile.heap_ratio) / profile.heap_ratio
+    if rss_max:
+        overhead = max(overhead, rss_max - committed)
+
+    # GC time only counts between consecutive samples of the same run, restarts reset it.
+    gc_time = elapsed = 0.0
+    for previous, current in zip(samples, samples[1:]):
+        if None in (previous[4], current[4]):
+            continue  # Not reported by the JVM.
+
+        if current[4] >= previous[4] and current[0] - previous[0] < 600:
+            gc_time += current[4] - previous[4]
+            elapsed += current[0] - previous[0]
+
+    return Recommendation(
+        heap=heap,
+        limit=_round_up(heap + overhead * 1.1),
+        live=round(live),
+        peak=round(peak),
+        rss=round(rss_max) if rss_max else None,
+        gc_percent=gc_time / elapsed * 100 if elapsed > 0 else None,
+        samples=len(samples),
+    )
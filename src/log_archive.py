@@ -0,0 +1,212 @@
+import asyncio
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from collections import deque
+
+import config
+from .metrics import LOG_ARCHIVE_BYTES, LOG_ARCHIVE_WRITE_SECONDS
+
+# Index entry of one compressed block: first and last line time, offset and length in the segment, line count.
+_ENTRY = struct.Struct('<ddQII')
+
+
+def _segment_name(timestamp: float) -> str:
+    return f'{int(timestamp * 1000):016d}'
+
+
+class LogArchive:
+    """
+    Console logs of one preset, kept on disk and in memory.
+
+    Lines are compressed in blocks of about `config.LOG_ARCHIVE_BLOCK_SIZE` bytes and appended to segment files
+    (`<first line time>.seg`), next to an index (`.idx`) holding the time range and position of every block.
+    Segments are rotated at `config.LOG_SEGMENT_SIZE` and only the newest `config.LOG_ARCHIVE_SEGMENTS` are kept.
+    Search skips segments and blocks outside the time range, so only the blocks it needs get decompressed.
+
+    The newest `config.LOG_TAIL_LINES` lines are also kept in memory for "/logs tail".
+    """
+
+    def __init__(self, preset_name: str):
+        self.path = f'{config.LOG_ARCHIVE_PATH}/{preset_name}'
+        self.tail_lines: deque[tuple[float, str]] = deque(maxlen=config.LOG_TAIL_LINES)
+
+        self._pending: list[tuple[float, str]] = []
+        self._pending_size = 0
+        self._segment: str | None = None
+
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop, writing whatever is still buffered."""
+        self._closed = True
+        self._wakeup.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def push(self, line: str):
+        """Archive one console line. Never blocks."""
+        entry = (time.time(), line)
+        self.tail_lines.append(entry)
+
+        if self._closed:
+            return
+
+        self._pending.append(entry)
+        self._pending_size += len(line) + 16
+
+        if self._pending_size >= config.LOG_ARCHIVE_BLOCK_SIZE:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.LOG_ARCHIVE_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+
+            # Lines keep coming in while a block is written, so keep going until nothing is left.
+            while self._pending:
+                lines, self._pending, self._pending_size = self._pending, [], 0
+
+                try:
+                    seconds, raw_size, size = await asyncio.to_thread(self._write_block, lines)
+                except OSError as e:
+                    print(f"❌ Couldn't archive logs to {self.path}: {e}")
+                    continue
+
+                # Recorded here rather than in the thread, metrics are only touched from the loop.
+                LOG_ARCHIVE_WRITE_SECONDS.observe(seconds)
+                LOG_ARCHIVE_BYTES.labels('raw').inc(raw_size)
+                LOG_ARCHIVE_BYTES.labels('compressed').inc(size)
+
+            if self._closed:
+                return
+
+    def _write_block(self, lines: list[tuple[float, str]]) -> tuple[float, int, int]:
+        """Returns how long it took, and the size of the lines before and after compression."""
+        os.makedirs(self.path, exist_ok=True)
+
+        if self._segment is None or os.path.getsize(f'{self.path}/{self._segment}.seg') >= config.LOG_SEGMENT_SIZE:
+            self._segment = _segment_name(lines[0][0])
+            self._remove_old_segments()
+
+        started = time.perf_counter()
+        raw = ''.join(f'{t:.3f}\t{line}\n' for t, line in lines).encode('utf-8')
+        data = zlib.compress(raw)
+
+        with open(f'{self.path}/{self._segment}.seg', 'ab') as file:
+            offset = file.tell()
+            file.write(data)
+
+        # Written after the block, so readers never see an entry for data that isn't there yet.
+        with open(f'{self.path}/{self._segment}.idx', 'ab') as file:
+            file.write(_ENTRY.pack(lines[0][0], lines[-1][0], offset, len(data), len(lines)))
+
+        return time.perf_counter() - started, len(raw), len(data)
+
+    def _segments(self) -> list[str]:
+        if not os.path.isdir(self.path):
+            return []
+
+        return sorted(x[:-4] for x in os.listdir(self.path) if x.endswith('.seg'))
+
+    def _remove_old_segments(self):
+        segments = self._segments()
+
+        # Making room for the segment about to be started.
+        for segment in segments[:max(len(segments) - config.LOG_ARCHIVE_SEGMENTS + 1, 0)]:
+            for extension in ('seg', 'idx'):
+                try:
+                    os.remove(f'{self.path}/{segment}.{extension}')
+                except FileNotFoundError:
+                    pass
+
+    def _index(self, segment: str) -> list[tuple[float, float, int, int, int]]:
+        try:
+            with open(f'{self.path}/{segment}.idx', 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return []
+
+        # A partially written last entry is ignored.
+        return list(_ENTRY.iter_unpack(data[:len(data) - len(data) % _ENTRY.size]))
+
+    def _blocks(self, since: float = None):
+        """Decompressed blocks, newest first, as lists of (time, line). Skips whatever is older than `since`."""
+        for segment in reversed(self._segments()):
+            index = self._index(segment)
+
+            if not index:
+                continue
+
+            if since is not None and index[-1][1] < since:
+                return  # This segment and every older one end before `since`.
+
+            with open(f'{self.path}/{segment}.seg', 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for first, last, offset, length, _ in reversed(index):
+                        if since is not None and last < since:
+                            return
+
+                        if offset + length > len(mapped):
+                            continue
+
+                        text = zlib.decompress(mapped[offset:offset + length]).decode('utf-8', errors='replace')
+                        block = []
+
+                        for row in text.splitlines():
+                            timestamp, _, line = row.partition('\t')
+                            block.append((float(timestamp), line))
+
+                        yield block
+
+    def tail(self, count: int) -> list[tuple[float, str]]:
+        """Last `count` lines, from memory when possible. Blocking, if it has to go to disk."""
+        # While the server runs, everything since it started is in memory.
+        if len(self.tail_lines) >= count or self._task is not None:
+            return list(self.tail_lines)[-count:]
+
+        lines: list[tuple[float, str]] = []
+        for block in self._blocks():
+            lines[:0] = block
+
+            if len(lines) >= count:
+                break
+
+        return lines[-count:]
+
+    def search(self, pattern: re.Pattern, since: float = None, limit: int = 50) -> list[tuple[float, str]]:
+        """Newest `limit` lines matching `pattern`, optionally only ones after `since`. Blocking."""
+        matches: list[tuple[float, str]] = []
+
+        def blocks():
+            # Lines that haven't been written yet are the newest.
+            yield list(self._pending)
+            yield from self._blocks(since)
+
+        for block in blocks():
+            for timestamp, line in reversed(block):
+                if since is not None and timestamp < since:
+                    continue
+
+                if pattern.search(line):
+                    matches.append((timestamp, line))
+
+                    if len(matches) >= limit:
+                        return matches[::-1]
+
+        return matches[::-1]
@@ -0,0 +1,132 @@
+import re
+import time
+from collections import namedtuple
+from typing import Callable, Iterable
+
+LogEvent = namedtuple('LogEvent', 'category,level,message,fields,line,time')
+
+# Vanilla/spigot "[12:34:56] [Server thread/INFO]: message" and paper "[12:34:56 INFO]: message".
+_HEADER = re.compile(
+    r'^\[(?P<clock>\d\d:\d\d:\d\d)(?: (?P<short_level>[A-Z]+)\]|\] \[[^\]]*/(?P<level>[A-Z]+)\]):? ?'
+)
+
+_PLAYER = r'[A-Za-z0-9_.]{1,16}'
+# What follows the player's name in vanilla death messages (the "death.*" translations), a line only counts
+# as a death if it continues with one of these. Longer phrases first, so they aren't cut short.
+_DEATHS = sorted((
+    'was shot by', 'was pummeled by', 'was pricked to death', 'walked into a cactus', 'drowned',
+    'experienced kinetic energy', 'blew up', 'was blown up by', 'was killed by', 'was killed while trying to hurt',
+    'hit the ground too hard', 'fell from a high place', 'fell off a ladder', 'fell off some',
+    'fell off scaffolding', 'fell while climbing',
+    'fell out of the world', 'fell too far and was finished by', 'was doomed to fall', 'was impaled',
+    'was squashed by', 'was squished too much', 'was skewered by a falling stalactite', 'went up in flames',
+    'walked into fire', 'burned to death', 'was burnt to a crisp', 'went off with a bang', 'tried to swim in lava',
+    'was struck by lightning', 'discovered the floor was lava', 'walked into the danger zone', 'froze to death',
+    'was frozen to death by', 'was slain by', 'was fireballed by', 'was stung to death', 'was obliterated by',
+    'starved to death', 'suffocated in a wall', 'left the confines of this world', 'was poked to death',
+    "didn't want to live in the same world as", 'withered away', 'was roasted in dragon breath', 'died',
+), key=len, reverse=True)
+
+# Categories are tried in this order, the first match wins. Groups inside a pattern are prefixed with the
+# category name, and end up in `LogEvent.fields` without the prefix.
+PATTERNS: dict[str, str] = {
+    'ready': r'Done \((?P<ready_seconds>\d+(?:\.\d+)?)s\)!.*',
+    'join': rf'(?P<join_player>{_PLAYER}) joined the game',
+    'leave': rf'(?P<leave_player>{_PLAYER}) left the game',
+    'chat': r'(?:\[Not Secure\] )?<(?P<chat_player>[^>]+)> (?P<chat_text>.*)',
+    'lag': r"Can't keep up! Is the server overloaded\? Running (?P<lag_ms>\d+)ms or (?P<lag_ticks>\d+) ticks behind",
+    'death': rf"(?P<death_player>{_PLAYER}) (?:{'|'.join(re.escape(x) for x in _DEATHS)})(?: .*)?",
+}
+
+# Lines that don't match a pattern are categorized by their level, anything else is 'other'.
+_LEVELS = {'WARN': 'warning', 'ERROR': 'error', 'FATAL': 'error'}
+
+CATEGORIES = [*PATTERNS, 'warning', 'error', 'other']
+
+_COMBINED = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in PATTERNS.items()))
+_FIELDS = {
+    name: [(group, group[len(name) + 1:]) for group in _COMBINED.groupindex if group.startswith(f'{name}_')]
+    for name in PATTERNS
+}
+
+
+def parse(line: str) -> LogEvent:
+    """Categorize one console line, with a single pass of one combined regex over the message."""
+    level = None
+    message = line
+
+    if header := _HEADER.match(line):
+        level = header.group('level') or header.group('short_level')
+        message = line[header.end():]
+
+    match = _COMBINED.fullmatch(message)
+
+    if match is not None:
+        # Category groups wrap their field groups, so the last group to close is the category.
+        category = match.lastgroup
+        fields = {field: match.group(group) for group, field in _FIELDS[category]}
+    else:
+        category = _LEVELS.get(level, 'other')
+        fields = {}
+
+    return LogEvent(category, level, message, fields, line, time.time())
+
+
+class LogEventBus:
+    """Hands parsed log events of every running server to whoever subscribed to their category."""
+
+    def __init__(self):
+        self._subscribers: dict[str | None, list[Callable[[str, LogEvent], None]]] = {}
+
+    def subscribe(self, callback: Callable[[str, LogEvent], None], categories: Iterable[str] = None):
+        """`callback(preset_name, event)` is called for events of `categories` (all if None), it must not block."""
+        for category in categories or [None]:
+            self._subscribers.setdefault(category, []).append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, LogEvent], None]):
+        for callbacks in self._subscribers.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, preset_name: str, event: LogEvent):
+        for callback in self._subscribers.get(event.category, ()):
+            callback(preset_name, event)
+
+        for callback in self._subscribers.get(None, ()):
+            callback(preset_name, event)
+
+
+class LogFilter:
+    """
+    Per-preset rules deciding which console lines are forwarded to discord.
+
+    Rules map a category to an action: 'drop' it, 'sample' it (forward one of every `every` lines),
+    or 'highlight' it. Categories without a rule are forwarded as they are.
+    """
+
+    def __init__(self, rules: dict[str, tuple[str, int]] = None):
+        self.rules = rules or {}
+        self._seen: dict[str, int] = {}
+
+    def apply(self, event: LogEvent) -> str | None:
+        """The line to forward, or None if it's filtered out."""
+        action, every = self.rules.get(event.category, ('show', 1))
+
+        if action == 'drop':
+            return None
+
+        if action == 'sample':
+            seen = self._seen.get(event.category, 0)
+            self._seen[event.category] = seen + 1
+
+            if seen % max(every, 1):
+                return None
+
+        if action == 'highlight':
+            # Forwarded logs are in a markdown code block, where '#' lines stand out.
+            return f'# {event.line}'
+
+        return event.line
+
+
+bus = LogEventBus()
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+
+import config
+from .http_client import http_client
+from .metrics import LOG_FORWARD_LAG_SECONDS, LOG_LINES, WEBHOOK_RATE_LIMITED, WEBHOOK_SEND_SECONDS
+
+_MESSAGE_LIMIT = 2000
+_PREFIX, _SUFFIX = '```md\n', '```'
+
+
+class LogForwarder:
+    """
+    Groups console lines into webhook messages close to discord's 2000 character limit.
+
+    Lines are buffered in a bounded queue and flushed every `config.LOG_FLUSH_INTERVAL` seconds,
+    or as soon as a full message worth of lines is waiting. When discord can't keep up, the oldest
+    lines are dropped and replaced with a short "N lines skipped" note.
+
+    Messages are wrapped in a code block, unless `code_block` is unset (for lines that use markdown themselves).
+    """
+
+    def __init__(self, webhook_url: str, flush_interval: float = None, code_block: bool = True):
+        self.webhook_url = webhook_url
+        self.flush_interval = flush_interval if flush_interval is not None else config.LOG_FLUSH_INTERVAL
+
+        self._prefix, self._suffix = (_PREFIX, _SUFFIX) if code_block else ('', '')
+        self._line_limit = _MESSAGE_LIMIT - len(self._prefix) - len(self._suffix) - 1
+
+        self._pending: deque[str] = deque()
+        self._pending_size = 0
+        self._dropped = 0
+        self._oldest_at = 0.0  # When the line at the front of the queue (roughly) was pushed.
+
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: asyncio.Task | None = None
+
+        # Bucket state, taken from discord's rate-limit headers.
+        self._remaining = 1
+        self._reset_at = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, flush: bool = True):
+        """Stop the forwarder, sending whatever is still buffered if `flush` is set."""
+        self._closed = True
+        if not flush:
+            self._clear()
+
+        self._wakeup.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    def push(self, line: str):
+        """Queue a single log line. Never blocks, safe to call on every line."""
+        if self._closed:
+            return
+
+        if len(line) > self._line_limit:
+            line = line[:self._line_limit - 1] + '…'
+
+        if len(self._pending) >= config.LOG_MAX_PENDING_LINES:
+            dropped = self._pending.popleft()
+            self._pending_size -= len(dropped) + 1
+            self._dropped += 1
+            LOG_LINES.labels('dropped').inc()
+
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+
+        self._pending.append(line)
+        self._pending_size += len(line) + 1
+
+        if self._pending_size >= self._line_limit:
+            self._wakeup.set()
+
+    def _clear(self):
+        self._pending.clear()
+        self._pending_size = 0
+        self._dropped = 0
+
+    def _next_message(self) -> str:
+        lines = []
+        size = 0
+        note = None
+
+        if self._dropped:
+            note = f'... {self._dropped} line(s) skipped, discord is rate limiting the log channel ...'
+            lines.append(note)
+            size += len(note) + 1
+            self._dropped = 0
+
+        while self._pending and size + len(self._pending[0]) + 1 <= self._line_limit:
+            line = self._pending.popleft()
+            self._pending_size -= len(line) + 1
+            lines.append(line)
+            size += len(line) + 1
+
+        # Only the first line's push time is kept, lines left over keep it too, so the lag is an upper bound.
+        LOG_LINES.labels('forwarded').inc(len(lines) - bool(note))
+        LOG_FORWARD_LAG_SECONDS.observe(time.monotonic() - self._oldest_at)
+
+        return self._prefix + '\n'.join(lines) + self._suffix
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+
+            while self._pending or self._dropped:
+                await self._send(self._next_message())
+
+                # Partial messages wait for the next interval, so bursts get grouped together.
+                if not self._closed and self._pending_size < self._line_limit:
+                    break
+
+            if self._closed:
+                return
+
+    async def _send(self, content: str):
+        while True:
+            if self._remaining <= 0:
+                await asyncio.sleep(max(self._reset_at - time.monotonic(), 0))
+                self._remaining = 1
+
+            started = time.perf_counter()
+
+            try:
+                async with http_client.session.post(
+                        url=self.webhook_url, json={"content": content}, params={"wait": "false"}
+                ) as response:
+                    self._update_bucket(response.headers)
+                    WEBHOOK_SEND_SECONDS.labels(str(response.status)).observe(time.perf_counter() - started)
+
+                    if response.status == 429:
+                        WEBHOOK_RATE_LIMITED.inc()
+                        data = await response.json(content_type=None)
+                        self._remaining = 0
+                        self._reset_at = time.monotonic() + float(data.get('retry_after', 1.0))
+                        continue
+
+                    if response.status == 404:
+                        # Webhook was deleted, there is nothing left to forward to.
+                        self._closed = True
+                        self._clear()
+
+                    return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # The message is given up on, but the forwarder keeps running for the next ones.
+                WEBHOOK_SEND_SECONDS.labels('error').observe(time.perf_counter() - started)
+                print(f'❌ Failed to forward logs: {e!r}')
+                return
+
+    def _update_bucket(self, headers):
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+
+        if remaining is not None:
+            self._remaining = int(remaining)
+
+        if reset_after is not None:
+            self._reset_at = time.monotonic() + float(reset_after)
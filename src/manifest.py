@@ -0,0 +1,99 @@
+import fnmatch
+import hashlib
+import json
+import os
+import re
+
+import config
+
+
+def _manifests_dir(preset: str) -> str:
+    return f'{config.MANIFEST_PATH}/{preset}'
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def build_manifest(volume: str, dimensions: list[str], previous: dict = None) -> dict[str, list]:
+    """
+    Map every file of the dimensions (relative to `volume`) to `[size, mtime_ns, sha256]`.
+    Files whose size and mtime match `previous` reuse its hash instead of being read again.
+
+    Blocking, call it with `asyncio.to_thread`.
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for dimension in dimensions:
+        for root, _, filenames in os.walk(f'{volume}/{dimension}'):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                relative = os.path.relpath(path, volume).replace("\\", "/")
+                stat = os.stat(path)
+
+                known = previous.get(relative)
+                if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                    digest = known[2]
+                else:
+                    digest = _hash_file(path)
+
+                manifest[relative] = [stat.st_size, stat.st_mtime_ns, digest]
+
+    return manifest
+
+
+def diff(old: dict, new: dict) -> tuple[list[str], list[str]]:
+    """
+    Files added or modified since `old` that match `config.DELTA_FILE_PATTERNS`, and files that were deleted.
+    """
+    changed = [
+        path for path, entry in new.items()
+        if (path not in old or old[path][2] != entry[2])
+        and any(fnmatch.fnmatchcase(path, pattern) for pattern in config.DELTA_FILE_PATTERNS)
+    ]
+    deleted = [path for path in old if path not in new]
+
+    return changed, deleted
+
+
+def save(preset: str, download_id: str, manifest: dict):
+    directory = _manifests_dir(preset)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(f'{directory}/{download_id}.json', 'w') as file:
+        json.dump(manifest, file)
+
+
+def load(preset: str, download_id: str) -> dict | None:
+    if not re.fullmatch(r'[0-9a-f-]+', download_id):
+        return None
+
+    path = f'{_manifests_dir(preset)}/{download_id}.json'
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def load_latest(preset: str) -> dict | None:
+    directory = _manifests_dir(preset)
+
+    if not os.path.exists(directory):
+        return None
+
+    paths = [f'{directory}/{x}' for x in os.listdir(directory) if x.endswith('.json')]
+
+    if not paths:
+        return None
+
+    with open(max(paths, key=os.path.getmtime)) as file:
+        return json.load(file)
@@ -0,0 +1,244 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+import config
+
+# Seconds, from a fast docker call to a slow world archive.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Metric:
+    """
+    One metric and its labeled children.
+
+    Children are created once per label combination and kept, so on hot paths an update is a dict lookup
+    and an addition. Everything runs on the bot's loop, so there's no locking.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}')
+            child = self._children[values] = self._new_child()
+
+        return child
+
+    def samples(self):
+        for values, child in self._children.items():
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}', *self.samples()]
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in self._children.items():
+            cumulative = 0
+
+            for bound, count in zip((*child.buckets, float('inf')), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+
+            labels = _format_labels(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {_format_value(child.sum)}'
+            yield f'{self.name}_count{labels} {child.count}'
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+            self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Every metric in Prometheus text format."""
+        return '\n'.join(x.render() for x in self.metrics.values()) + '\n'
+
+
+registry = MetricsRegistry()
+
+COMMAND_SECONDS = registry.histogram(
+    'mcbot_command_seconds', 'Slash command run time.', ('command', 'outcome')
+)
+DOCKER_CALL_SECONDS = registry.histogram(
+    'mcbot_docker_call_seconds', 'Docker API call duration.', ('call', 'outcome')
+)
+WEBHOOK_SEND_SECONDS = registry.histogram(
+    'mcbot_webhook_send_seconds', 'Duration of log webhook posts.', ('status',)
+)
+WEBHOOK_RATE_LIMITED = registry.counter(
+    'mcbot_webhook_rate_limited_total', 'Log webhook posts answered with 429.'
+)
+LOG_LINES = registry.counter(
+    'mcbot_log_lines_total', 'Console lines by what happened to them.', ('outcome',)
+)
+LOG_FORWARD_LAG_SECONDS = registry.histogram(
+    'mcbot_log_forward_lag_seconds', 'Time between a console line being read and posted to discord.'
+)
+LOG_ARCHIVE_BYTES = registry.counter(
+    'mcbot_log_archive_bytes_total', 'Bytes of console logs archived, before and after compression.', ('kind',)
+)
+LOG_ARCHIVE_WRITE_SECONDS = registry.histogram(
+    'mcbot_log_archive_write_seconds', 'Time to compress and write one log archive block.'
+)
+WORLD_ARCHIVE_SECONDS = registry.histogram(
+    'mcbot_world_archive_seconds', 'Time to archive world(s) for a download.', ('codec',)
+)
+WORLD_ARCHIVE_BYTES = registry.counter(
+    'mcbot_world_archive_bytes_total', 'Size of world archives written.', ('codec',)
+)
+RUNNING_SERVERS = registry.gauge(
+    'mcbot_running_servers', 'Servers in the registry, running, queued or sleeping.'
+)
+
+
+class MetricsServer:
+    """Serves `/metrics` for Prometheus on `config.METRICS_HOST`:`config.METRICS_PORT`."""
+
+    def __init__(self, bot=None):
+        self.bot = bot
+        self._runner: web.AppRunner | None = None
+
+    async def start(self):
+        if not config.METRICS_PORT or self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get('/metrics', self._metrics)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, config.METRICS_HOST, config.METRICS_PORT).start()
+
+        print(f'☑ Metrics on http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics')
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request):
+        if self.bot is not None:
+            RUNNING_SERVERS.set(len(self.bot.servers))
+
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
@@ -1,3 +1,7 @@
 from .preset import Preset
+from .resource_sample import ResourceSample
+from .startup_record import StartupRecord
+from .log_rule import LogRule
+from .jvm_tuning import PresetTuning, HeapSample
 
-__models__ = [Preset]
+__models__ = [Preset, ResourceSample, StartupRecord, LogRule, PresetTuning, HeapSample]
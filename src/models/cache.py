@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .preset import Preset
+
+
+class PresetCache:
+    """
+    Identity map of presets by name, least recently used ones are evicted past `max_size`.
+
+    Presets with a server session (starting, running, sleeping or waiting for room) are never evicted,
+    they hold the runtime state (container, webhook, ...) that every lookup of that preset has to see.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._presets: OrderedDict[str, 'Preset'] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._presets)
+
+    def get(self, name: str) -> 'Preset | None':
+        preset = self._presets.get(name)
+
+        if preset is not None:
+            self._presets.move_to_end(name)
+
+        return preset
+
+    def put(self, preset: 'Preset') -> 'Preset':
+        """Cache `preset`, unless a live object for that name already is; returns the cached one."""
+        cached = self._presets.setdefault(preset.name, preset)
+        self._presets.move_to_end(preset.name)
+        self._evict()
+
+        return cached
+
+    def replace(self, preset: 'Preset'):
+        """
+        Cache a just saved `preset`. If another object for that name is cached, it's kept and gets the saved
+        fields instead, it may hold runtime state (a running or sleeping server) that lookups have to keep seeing.
+        """
+        cached = self._presets.get(preset.name)
+
+        if cached is not None and cached is not preset:
+            for field in preset._meta.fields_map:
+                setattr(cached, field, getattr(preset, field))
+        else:
+            self._presets[preset.name] = preset
+
+        self._presets.move_to_end(preset.name)
+        self._evict()
+
+    def discard(self, name: str):
+        self._presets.pop(name, None)
+
+    def _evict(self):
+        if len(self._presets) <= self.max_size:
+            return
+
+        for name in [name for name, x in self._presets.items() if not x.running and x.session is None]:
+            if len(self._presets) <= self.max_size:
+                break
+
+            del self._presets[name]
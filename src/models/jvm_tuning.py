@@ -0,0 +1,30 @@
+from tortoise.models import Model
+from tortoise.fields import IntField, CharField, BooleanField, FloatField, DatetimeField
+
+
+class PresetTuning(Model):
+    """JVM profile of a preset, and whether its memory is sized from measured usage."""
+
+    id = IntField(pk=True)
+    preset = CharField(max_length=20, unique=True)
+    profile = CharField(max_length=20, default='default')
+    auto_size = BooleanField(default=False)
+
+    def __repr__(self):
+        return f'PresetTuning({self.preset=}, {self.profile=}, {self.auto_size=})'
+
+
+class HeapSample(Model):
+    """JVM heap usage of a running server, from `jcmd <pid> GC.heap_info`."""
+
+    id = IntField(pk=True)
+    preset = CharField(max_length=20, index=True)
+    timestamp = DatetimeField(auto_now_add=True, index=True)
+
+    used = FloatField()  # MB
+    committed = FloatField()
+    old_used = FloatField()
+    gc_time = FloatField(null=True)  # Seconds spent in GC since the server started, None if not reported
+
+    def __repr__(self):
+        return f'HeapSample({self.preset=}, {self.used=})'
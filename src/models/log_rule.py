@@ -0,0 +1,18 @@
+from tortoise.models import Model
+from tortoise.fields import IntField, CharField
+
+
+class LogRule(Model):
+    """What happens to console lines of one category of a preset before they're forwarded to discord."""
+
+    id = IntField(pk=True)
+    preset = CharField(max_length=20, index=True)
+    category = CharField(max_length=16)
+    action = CharField(max_length=10)  # 'drop', 'sample' or 'highlight'
+    every = IntField(default=1)  # With 'sample', one of this many lines is forwarded
+
+    class Meta:
+        unique_together = (('preset', 'category'),)
+
+    def __repr__(self):
+        return f'LogRule({self.preset=}, {self.category=}, {self.action=})'
@@ -1,8 +1,10 @@
 import asyncio
-import threading
+import datetime
+import re
+import secrets
+import time
 from typing import Any
 
-import aiohttp
 import discord
 import docker.models.containers
 from tortoise.models import Model
@@ -11,6 +13,21 @@ from tortoise.fields import TextField, IntField, JSONField, CharField
 import config
 import src
 from config import DEFAULT_PRESET_CONFIG
+from .cache import PresetCache
+from .startup_record import StartupRecord
+from .log_rule import LogRule
+from .jvm_tuning import PresetTuning, HeapSample
+from .resource_sample import ResourceSample
+from ..containers import containers
+from ..exceptions import RconError, RconUnavailable
+from ..images import image_name
+from ..jvm import PROFILES, JvmProfile, Recommendation, recommend, supports
+from ..jar_cache import jar_cache
+from ..log_archive import LogArchive
+from ..log_events import LogFilter, bus, parse
+from ..log_forwarder import LogForwarder
+from ..rcon import RconClient
+from ..server_registry import ServerSession
 from ..versions import Versions
 
 
@@ -26,9 +43,35 @@ class Preset(Model):
 
     properties = JSONField(default=DEFAULT_PRESET_CONFIG)
 
+    _identity_map = PresetCache(config.PRESET_CACHE_SIZE)
+
     def __init__(self, **kwargs: Any):
         super().__init__(**kwargs)
 
+    @classmethod
+    async def get_cached(cls, name: str) -> 'Preset | None':
+        """
+        Look up a preset by name, served from memory when possible.
+        Always returns the same object for the same preset, so runtime state is shared.
+        """
+        preset = cls._identity_map.get(name)
+
+        if preset is None:
+            preset = await cls.get_or_none(name=name)
+
+            if preset is not None:
+                preset = cls._identity_map.put(preset)
+
+        return preset
+
+    async def save(self, *args, **kwargs):
+        await super().save(*args, **kwargs)
+        self._identity_map.replace(self)
+
+    async def delete(self, *args, **kwargs):
+        await super().delete(*args, **kwargs)
+        self._identity_map.discard(self.name)
+
     @property
     def running(self) -> bool:
         try:
@@ -41,6 +84,19 @@ class Preset(Model):
     def running(self, x: bool):
         setattr(self, '_running', x)
 
+    @property
+    def session(self) -> ServerSession | None:
+        """Registry session of the preset, set while it's started, running, sleeping or queued."""
+        try:
+            return getattr(self, '_session')
+        except AttributeError:
+            setattr(self, '_session', None)
+            return self.session
+
+    @session.setter
+    def session(self, x: ServerSession | None):
+        setattr(self, '_session', x)
+
     @property
     def container(self) -> docker.models.containers.Container:
         try:
@@ -65,20 +121,237 @@ class Preset(Model):
     def webhook(self, x):
         setattr(self, '_webhook', x)
 
+    @property
+    def log_task(self) -> asyncio.Task:
+        try:
+            return getattr(self, '_log_task')
+        except AttributeError:
+            setattr(self, '_log_task', None)
+            return self.log_task
+
+    @log_task.setter
+    def log_task(self, x):
+        setattr(self, '_log_task', x)
+
+    @property
+    def forwarder(self) -> LogForwarder:
+        try:
+            return getattr(self, '_forwarder')
+        except AttributeError:
+            setattr(self, '_forwarder', None)
+            return self.forwarder
+
+    @forwarder.setter
+    def forwarder(self, x):
+        setattr(self, '_forwarder', x)
+
+    @property
+    def rcon(self) -> RconClient:
+        try:
+            return getattr(self, '_rcon')
+        except AttributeError:
+            setattr(self, '_rcon', None)
+            return self.rcon
+
+    @rcon.setter
+    def rcon(self, x):
+        setattr(self, '_rcon', x)
+
+    @property
+    def log_archive(self) -> LogArchive:
+        try:
+            return getattr(self, '_log_archive')
+        except AttributeError:
+            setattr(self, '_log_archive', None)
+            return self.log_archive
+
+    @log_archive.setter
+    def log_archive(self, x):
+        setattr(self, '_log_archive', x)
+
+    @property
+    def log_filter(self) -> LogFilter:
+        try:
+            return getattr(self, '_log_filter')
+        except AttributeError:
+            setattr(self, '_log_filter', LogFilter())
+            return self.log_filter
+
+    @log_filter.setter
+    def log_filter(self, x):
+        setattr(self, '_log_filter', x)
+
+    async def load_log_rules(self):
+        rules = await LogRule.filter(preset=self.name)
+        self.log_filter = LogFilter({x.category: (x.action, x.every) for x in rules})
+
+    @property
+    def ready(self) -> asyncio.Event:
+        """Set once the running server finished loading."""
+        try:
+            return getattr(self, '_ready')
+        except AttributeError:
+            setattr(self, '_ready', asyncio.Event())
+            return self.ready
+
+    @ready.setter
+    def ready(self, x):
+        setattr(self, '_ready', x)
+
+    @property
+    def started_at(self) -> float:
+        try:
+            return getattr(self, '_started_at')
+        except AttributeError:
+            setattr(self, '_started_at', 0.0)
+            return self.started_at
+
+    @started_at.setter
+    def started_at(self, x):
+        setattr(self, '_started_at', x)
+
+    @property
+    def heap_sampling_error(self) -> str | None:
+        """Why the heap sampler can't measure this server, None while it can."""
+        try:
+            return getattr(self, '_heap_sampling_error')
+        except AttributeError:
+            setattr(self, '_heap_sampling_error', None)
+            return self.heap_sampling_error
+
+    @heap_sampling_error.setter
+    def heap_sampling_error(self, x):
+        setattr(self, '_heap_sampling_error', x)
+
+    @property
+    def logs_since(self) -> float | None:
+        """Unix time the container was (re)started at, older log lines belong to a previous run."""
+        try:
+            return getattr(self, '_logs_since')
+        except AttributeError:
+            setattr(self, '_logs_since', None)
+            return self.logs_since
+
+    @logs_since.setter
+    def logs_since(self, x):
+        setattr(self, '_logs_since', x)
+
+    @property
+    def server_startup(self) -> float | None:
+        """Startup time the server itself reported."""
+        try:
+            return getattr(self, '_server_startup')
+        except AttributeError:
+            setattr(self, '_server_startup', None)
+            return self.server_startup
+
+    @server_startup.setter
+    def server_startup(self, x):
+        setattr(self, '_server_startup', x)
+
     def __repr__(self):
         return f'Preset({self.name=}, {self.version=})'
 
+    async def send_command(self, cmd: str) -> str:
+        """
+        Run a console command on the running server and return its output.
+        Goes through RCON, until RCON is up (while the server starts) the command is piped to the console instead.
+        Once the command is sent over RCON it's never sent again, if it times out the `RconError` is raised.
+        """
+        if self.rcon is not None:
+            try:
+                return re.sub('§.', '', await self.rcon.command(cmd))
+            except RconUnavailable:
+                pass
+
+        if self.container is None:
+            raise RconUnavailable(f"{self.name} isn't running.")
+
+        # Console is reached through a shell, so the command has to be escaped.
+        cmd = cmd.translate(cmd.maketrans(config.ESCAPED_CHARACTERS))
+        response = await src.docker_backend.exec_run(self.container, ["mc-send-to-console", cmd])
+
+        return response.output.decode('utf-8')
+
+    async def link_shared_files(self):
+        """Put cached server jar and libraries of this version/server type into the server directory."""
+        try:
+            linked = await asyncio.to_thread(jar_cache.populate, self.name, self.version, self.server_type)
+        except OSError as e:
+            print(f"❌ Couldn't link shared files for {self.name}: {e}")
+            return
+
+        if linked:
+            print(f'☑ Linked {linked} shared file(s) into {self.name}')
+
+    async def capture_shared_files(self):
+        """Move the server jar and libraries of a stopped server into the shared cache."""
+        try:
+            await asyncio.to_thread(jar_cache.capture, self.name, self.version, self.server_type)
+        except OSError as e:
+            print(f"❌ Couldn't cache shared files of {self.name}: {e}")
+
+    async def recommend_memory(self, profile: JvmProfile) -> Recommendation | None:
+        """Heap size and container limit from measured usage, None until there are enough samples."""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=config.HEAP_SAMPLE_RETENTION)
+
+        rows = await HeapSample.filter(preset=self.name).order_by('timestamp').values_list(
+            'timestamp', 'used', 'committed', 'old_used', 'gc_time'
+        )
+        biggest = await ResourceSample.filter(
+            preset=self.name, timestamp__gte=cutoff
+        ).order_by('-memory_max').first()
+
+        return recommend(
+            [(x[0].timestamp(), *x[1:]) for x in rows],
+            biggest.memory_max / 1024 ** 2 if biggest else None,
+            profile, config.HEAP_MIN_SAMPLES
+        )
+
+    async def jvm_settings(self, java_version: str) -> tuple[JvmProfile, int, int]:
+        """JVM profile, heap size and container limit (MB) to start the server with."""
+        tuning = await PresetTuning.get_or_none(preset=self.name)
+        profile = PROFILES.get(tuning.profile if tuning else 'default', PROFILES['default'])
+
+        if not supports(profile, java_version):
+            print(f"❌ JVM profile {profile.name} doesn't support {java_version}, {self.name} uses the default one.")
+            profile = PROFILES['default']
+
+        if tuning is not None and tuning.auto_size and (recommended := await self.recommend_memory(profile)):
+            return profile, recommended.heap, recommended.limit
+
+        return profile, round(self.memory * profile.heap_ratio), self.memory
+
     async def shutdown_logic(self, wait: float = 15.0):
         await asyncio.sleep(wait)
         try:
             if self.container:
-                self.container.stop()
-            src.docker_client.containers.prune()
-            src.docker_client.volumes.prune()
+                await containers.stop(self.container)
+                await self.capture_shared_files()
         finally:
             self.container = None
             self.running = False
 
+            if self.rcon:
+                await self.rcon.close()
+
+            self.rcon = None
+
+            if self.log_task:
+                self.log_task.cancel()
+
+            self.log_task = None
+
+            if self.forwarder:
+                await self.forwarder.close()
+
+            self.forwarder = None
+
+            if self.log_archive:
+                await self.log_archive.close()
+
+            self.log_archive = None
+
             if self.webhook:
                 await self.webhook.delete()
 
@@ -96,13 +369,14 @@ class Preset(Model):
         if java_version is None:
             raise Exception("This version is not declared in the versions enum! Please fix.")
 
-        java_memory = round(preset.memory * 0.75)
+        profile, java_memory, memory_limit = await self.jvm_settings(java_version)
 
         env = [
             "EULA=true",
             f"VERSION={version}",
             f'MEMORY={java_memory}M',
-            f'TYPE={preset.server_type}'
+            f'TYPE={preset.server_type}',
+            *profile.env
         ]
 
         for var in preset.properties:
@@ -112,18 +386,39 @@ class Preset(Model):
 
             env.append(f'{var}={preset.properties[var]}')
 
-        container = src.docker_client.containers.run(
-            image=f'itzg/minecraft-server:{java_version}',
-            name=preset.name,
+        rcon_password = secrets.token_urlsafe(24)
+        env += ["ENABLE_RCON=true", f"RCON_PORT={config.RCON_PORT}", f"RCON_PASSWORD={rcon_password}"]
+
+        await self.link_shared_files()
+
+        started = time.time()
+        container, reused = await containers.start(
+            preset.name,
+            image=image_name(java_version),
             environment=env,
-            ports={f'{preset.port}/tcp': (config.IP, str(preset.port))},
+            ports={
+                f'{preset.port}/tcp': (config.IP, str(preset.port)),
+                # RCON is only reachable by the bot, on a port docker picks.
+                f'{config.RCON_PORT}/tcp': ('127.0.0.1', None),
+            },
             volumes=[f"{config.DOCKER_VOLUME_PATH}/{preset.name}:/data"],
-            mem_limit=f'{preset.memory}m',
-            detach=True
+            mem_limit=f'{memory_limit}m'
         )
 
+        if reused:
+            # The kept container still has the password it was created with.
+            rcon_password = src.docker_backend.container_env(container).get('RCON_PASSWORD', rcon_password)
+
         self.running = True
         self.container = container
+        self.ready = asyncio.Event()
+        self.started_at = time.monotonic()
+        self.logs_since = started
+        self.server_startup = None
+
+        rcon_port = await src.docker_backend.host_port(container, f'{config.RCON_PORT}/tcp')
+        if rcon_port is not None:
+            self.rcon = RconClient('127.0.0.1', rcon_port, rcon_password)
 
         if logging:
             webhook = await logging_channel.create_webhook(name=f'{self.name} Logs')
@@ -132,28 +427,71 @@ class Preset(Model):
 
             await self.start_logging()
 
+    async def wait_until_ready(self, timeout: float = None) -> float | None:
+        """
+        Wait for the server to finish loading, and record how long it took.
+        Returns the startup time in seconds, or None if it stopped or didn't get ready in time.
+        """
+        ready = self.ready
+
+        async def poll():
+            # Fallback for when the "Done" line is missed (logs not read, unusual server output).
+            while self.running and not ready.is_set():
+                await asyncio.sleep(config.READY_POLL_INTERVAL)
+
+                if self.rcon is not None and not ready.is_set():
+                    try:
+                        await self.rcon.command('list')
+                        ready.set()
+                    except RconError:
+                        pass
+
+        waiters = [asyncio.create_task(ready.wait()), asyncio.create_task(poll())]
+        try:
+            await asyncio.wait(waiters, timeout=timeout or config.READY_TIMEOUT, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in waiters:
+                task.cancel()
+
+        if not ready.is_set() or ready is not self.ready or not self.running:
+            return None
+
+        seconds = time.monotonic() - self.started_at
+
+        await StartupRecord.create(
+            preset=self.name, version=self.version, server_type=self.server_type, memory=self.memory,
+            image=src.docker_backend.image_id(self.container), seconds=seconds, server_seconds=self.server_startup
+        )
+
+        return seconds
+
     async def start_logging(self):
-        async def logger():
-            logs = self.container.logs(stream=True)
+        forwarder = LogForwarder(self.webhook.url)
+        forwarder.start()
+        self.forwarder = forwarder
 
-            for log in logs:
+        archive = LogArchive(self.name)
+        archive.start()
+        self.log_archive = archive
+
+        await self.load_log_rules()
+
+        async def logger():
+            async for log in src.docker_backend.logs(self.container, since=self.logs_since):
                 if not self.running:
                     break
 
-                log = log.decode('utf-8').rstrip('\n')
                 print(log)
+                archive.push(log)
 
-                async with aiohttp.ClientSession() as session:
-                    await session.post(
-                        url=self.webhook.url,
-                        data={"content": f'```md\n{log}```'}
-                    )
+                event = parse(log)
+                bus.publish(self.name, event)
 
-        def starter():
-            new_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(new_loop)
+                if event.category == 'ready' and not self.ready.is_set():
+                    self.server_startup = float(event.fields['seconds'])
+                    self.ready.set()
 
-            new_loop.run_until_complete(logger())
+                if (line := self.log_filter.apply(event)) is not None:
+                    forwarder.push(line)
 
-        thread1 = threading.Thread(target=starter, daemon=True)
-        thread1.start()
+        self.log_task = asyncio.create_task(logger())
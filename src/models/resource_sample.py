@@ -0,0 +1,22 @@
+from tortoise.models import Model
+from tortoise.fields import IntField, CharField, FloatField, BigIntField, DatetimeField
+
+
+class ResourceSample(Model):
+    """Averaged container resource usage of a preset over one minute or one hour."""
+
+    id = IntField(pk=True)
+    preset = CharField(max_length=20, index=True)
+    resolution = CharField(max_length=6)  # 'minute' or 'hour'
+    timestamp = DatetimeField(index=True)
+
+    cpu = FloatField()  # Percent of one core
+    memory = BigIntField()  # Bytes
+    memory_max = BigIntField()
+    net_rx = FloatField()  # Bytes per second
+    net_tx = FloatField()
+    block_read = FloatField()
+    block_write = FloatField()
+
+    def __repr__(self):
+        return f'ResourceSample({self.preset=}, {self.resolution=}, {self.timestamp=})'
@@ -0,0 +1,20 @@
+from tortoise.models import Model
+from tortoise.fields import IntField, CharField, FloatField, DatetimeField, TextField
+
+
+class StartupRecord(Model):
+    """How long a server took from container start until it was ready to take commands."""
+
+    id = IntField(pk=True)
+    preset = CharField(max_length=20, index=True)
+    version = TextField()
+    server_type = TextField()
+    memory = IntField()  # MB
+    image = TextField()  # Image ID, to tell startups before and after an image update apart
+    timestamp = DatetimeField(auto_now_add=True, index=True)
+
+    seconds = FloatField()  # From the container starting until ready
+    server_seconds = FloatField(null=True)  # What the server reported in its "Done" line
+
+    def __repr__(self):
+        return f'StartupRecord({self.preset=}, {self.version=}, {self.seconds=})'
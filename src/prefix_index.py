@@ -0,0 +1,36 @@
+from bisect import bisect_left, insort
+from typing import Iterable
+
+
+class PrefixIndex:
+    """Sorted list of names, prefix lookups are two binary searches instead of a full scan."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: list[str] = sorted(set(names))
+
+    def build(self, names: Iterable[str]):
+        self._names = sorted(set(names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        index = bisect_left(self._names, name)
+        return index < len(self._names) and self._names[index] == name
+
+    def add(self, name: str):
+        if name not in self:
+            insort(self._names, name)
+
+    def remove(self, name: str):
+        index = bisect_left(self._names, name)
+
+        if index < len(self._names) and self._names[index] == name:
+            del self._names[index]
+
+    def complete(self, prefix: str, limit: int = 25) -> list[str]:
+        """Up to `limit` names starting with `prefix`, in alphabetical order (discord shows at most 25)."""
+        start = bisect_left(self._names, prefix)
+        end = bisect_left(self._names, prefix + '\uffff', lo=start)
+
+        return self._names[start:min(end, start + limit)]
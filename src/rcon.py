@@ -0,0 +1,226 @@
+import asyncio
+import itertools
+import struct
+from typing import Callable
+
+import config
+from .exceptions import RconError, RconUnavailable
+
+_LOGIN = 3
+_COMMAND = 2
+_RESPONSE = 0
+
+# Responses longer than this are split into several packets with the same ID.
+_MAX_PAYLOAD = 4096
+
+
+def _pack(request_id: int, packet_type: int, payload: str) -> bytes:
+    body = struct.pack('<ii', request_id, packet_type) + payload.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(body)) + body
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, int, str]:
+    length, = struct.unpack('<i', await reader.readexactly(4))
+    body = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack('<ii', body[:8])
+
+    return request_id, packet_type, body[8:-2].decode('utf-8', errors='replace')
+
+
+class RconClient:
+    """
+    One authenticated RCON connection to a server.
+
+    Commands are pipelined: each gets its own request ID and is written right away, a single reader
+    task matches responses back to the waiting command. The connection is (re)opened on demand,
+    so a client can be created before the server is up and survives server-side disconnects.
+    """
+
+    def __init__(self, host: str, port: int, password: str):
+        self.host = host
+        self.port = port
+        self.password = password
+
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._partial: dict[int, list[str]] = {}
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task | None = None
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self.connected:
+                return
+
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), timeout=config.RCON_TIMEOUT
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise RconUnavailable(f"Couldn't connect to RCON: {e}") from e
+
+            login_id = next(self._ids)
+            writer.write(_pack(login_id, _LOGIN, self.password))
+
+            try:
+                await writer.drain()
+                request_id, _, _ = await asyncio.wait_for(_read_packet(reader), timeout=config.RCON_TIMEOUT)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                writer.close()
+                raise RconUnavailable(f"RCON login failed: {e}") from e
+
+            if request_id != login_id:
+                writer.close()
+                raise RconUnavailable("RCON login failed: wrong password.")
+
+            self._reader, self._writer = reader, writer
+            self._read_task = asyncio.create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                request_id, _, payload = await _read_packet(reader)
+
+                future = self._pending.get(request_id)
+                if future is None:
+                    continue
+
+                self._partial.setdefault(request_id, []).append(payload)
+
+                if len(payload.encode('utf-8')) < _MAX_PAYLOAD:
+                    self._resolve(request_id)
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Only tear down the connection this loop was reading from, not one opened after it.
+            if self._reader is reader:
+                self._disconnect(RconError("RCON connection lost."))
+
+    def _resolve(self, request_id: int):
+        future = self._pending.pop(request_id, None)
+        parts = self._partial.pop(request_id, [])
+
+        if future is not None and not future.done():
+            future.set_result(''.join(parts))
+
+    def _disconnect(self, error: Exception):
+        if self._writer is not None:
+            self._writer.close()
+
+        self._reader = self._writer = None
+
+        for request_id, future in list(self._pending.items()):
+            if self._partial.get(request_id):
+                # Whatever arrived before the connection dropped is still the command's output.
+                self._resolve(request_id)
+            elif not future.done():
+                future.set_exception(error)
+
+        self._pending.clear()
+        self._partial.clear()
+
+    async def command(self, cmd: str, timeout: float = None) -> str:
+        """Run a console command and return its output."""
+        if not self.connected:
+            await self._connect()
+
+        writer = self._writer
+        if writer is None:
+            # Dropped again right after connecting, nothing was sent yet.
+            raise RconUnavailable("RCON connection lost before the command was sent.")
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        try:
+            writer.write(_pack(request_id, _COMMAND, cmd))
+            await writer.drain()
+        except OSError as e:
+            self._pending.pop(request_id, None)
+            self._disconnect(RconError(f"RCON connection lost: {e}"))
+            raise RconError(f"RCON connection lost: {e}") from e
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or config.RCON_TIMEOUT)
+        except asyncio.TimeoutError:
+            # A response that was exactly a multiple of the packet size looks unfinished, return what we have.
+            if self._partial.get(request_id):
+                self._resolve(request_id)
+                return future.result()
+
+            self._pending.pop(request_id, None)
+            raise RconError(f"RCON command `{cmd}` timed out.")
+
+    async def close(self):
+        task = self._read_task
+        self._read_task = None
+
+        self._disconnect(RconError("RCON client closed."))
+
+        if task is not None:
+            task.cancel()
+
+
+class FakeRconServer:
+    """
+    Local RCON server for testing without a minecraft server,
+    commands are answered by `handler` (echoes them back by default).
+    With `password` set to None any password is accepted.
+    """
+
+    def __init__(self, password: str | None, handler: Callable[[str], str] = None):
+        self.password = password
+        self.handler = handler or (lambda cmd: f'Executed {cmd}')
+        self.commands: list[str] = []
+
+        self._server: asyncio.AbstractServer | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+
+            for writer in list(self._writers):
+                writer.close()
+
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        authenticated = False
+        self._writers.add(writer)
+
+        try:
+            while True:
+                request_id, packet_type, payload = await _read_packet(reader)
+
+                if packet_type == _LOGIN:
+                    authenticated = self.password is None or payload == self.password
+                    writer.write(_pack(request_id if authenticated else -1, _COMMAND, ''))
+                elif not authenticated:
+                    writer.write(_pack(-1, _RESPONSE, ''))
+                else:
+                    self.commands.append(payload)
+                    response = self.handler(payload).encode('utf-8')
+
+                    for i in range(0, max(len(response), 1), _MAX_PAYLOAD):
+                        chunk = response[i:i + _MAX_PAYLOAD].decode('utf-8', errors='ignore')
+                        writer.write(_pack(request_id, _RESPONSE, chunk))
+
+                await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
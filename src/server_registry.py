@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING, Iterator
+
+from .exceptions import AlreadyRunning
+
+if TYPE_CHECKING:
+    from .models import Preset
+    from .sleep_proxy import SleepProxy
+
+
+class ServerSession:
+    def __init__(self, preset: 'Preset', console_channel: int):
+        self.preset = preset
+        self.console_channel = console_channel
+        self.proxy: 'SleepProxy | None' = None  # Holds the port while the server sleeps
+
+    @property
+    def name(self) -> str:
+        return self.preset.name
+
+    @property
+    def container(self):
+        return self.preset.container
+
+    @property
+    def sleeping(self) -> bool:
+        return self.proxy is not None
+
+    def __repr__(self):
+        return f'ServerSession({self.name=}, {self.console_channel=})'
+
+
+class ServerRegistry:
+    """
+    Keeps track of every running server, indexed both by preset name and by console channel,
+    so commands can be routed to the right container without scanning.
+
+    A session is added *before* its container is started, which keeps two `/start`s of
+    the same preset (or on the same channel/port) from racing each other.
+    """
+
+    def __init__(self):
+        self._by_preset: dict[str, ServerSession] = {}
+        self._by_channel: dict[int, ServerSession] = {}
+
+    def __iter__(self) -> Iterator[ServerSession]:
+        return iter(list(self._by_preset.values()))
+
+    def __len__(self) -> int:
+        return len(self._by_preset)
+
+    def __contains__(self, preset_name: str) -> bool:
+        return preset_name in self._by_preset
+
+    def get(self, preset_name: str) -> ServerSession | None:
+        return self._by_preset.get(preset_name)
+
+    def by_channel(self, channel_id: int) -> ServerSession | None:
+        return self._by_channel.get(channel_id)
+
+    def by_port(self, port: int) -> ServerSession | None:
+        for session in self._by_preset.values():
+            if session.preset.port == port:
+                return session
+
+        return None
+
+    def add(self, preset: 'Preset', console_channel: int) -> ServerSession:
+        if preset.name in self._by_preset:
+            raise AlreadyRunning()
+
+        session = ServerSession(preset, console_channel)
+
+        self._by_preset[preset.name] = session
+        self._by_channel[console_channel] = session
+        preset.session = session
+
+        return session
+
+    def remove(self, preset_name: str) -> ServerSession | None:
+        session = self._by_preset.pop(preset_name, None)
+
+        if session is not None and self._by_channel.get(session.console_channel) is session:
+            del self._by_channel[session.console_channel]
+
+        if session is not None and session.preset.session is session:
+            session.preset.session = None
+
+        return session
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import config
+import src
+from .containers import containers
+from .models import Preset
+from .startup import StartupTimer
+
+
+class ShutdownCoordinator:
+    """
+    Stops every server the bot manages, all at once.
+
+    All servers get `save-all`, then `stop`, and are given until one shared deadline to exit on their own,
+    whatever is still running then is killed. Containers the bot didn't start this run (left behind by an
+    earlier run, or presets that don't exist anymore) have no RCON connection, they get a docker stop instead,
+    the server saves on its SIGTERM.
+    """
+
+    def __init__(self, bot, deadline: float = None):
+        self.bot = bot
+        self.deadline = deadline or config.SHUTDOWN_DEADLINE
+        self.timer = StartupTimer('Shutdown timings')
+
+        self._deadline_at = 0.0
+
+    def _remaining(self) -> float:
+        return max(self._deadline_at - time.monotonic(), 0.0)
+
+    async def _servers(self) -> list[tuple[Preset | None, object]]:
+        servers = {x.name: (x.preset, x.container) for x in self.bot.servers if x.container is not None}
+
+        # Containers left behind by an earlier run of the bot, or started outside of "/start".
+        try:
+            leftovers = await containers.running()
+        except Exception as e:
+            print(f"❌ Couldn't list running containers, only stopping the bot's own servers: {e}")
+            leftovers = []
+
+        for container in leftovers:
+            if container.name not in servers:
+                servers[container.name] = (None, container)
+
+        return list(servers.values())
+
+    async def _command_all(self, presets: list[Preset], cmd: str):
+        async def send(preset: Preset):
+            try:
+                await asyncio.wait_for(preset.send_command(cmd), timeout=min(self._remaining(), config.RCON_TIMEOUT))
+            except Exception as e:
+                print(f"❌ Couldn't send `{cmd}` to {preset.name}: {e}")
+
+        await asyncio.gather(*(send(x) for x in presets))
+
+    async def _wait_for_exit(self, preset: Preset | None, container) -> bool:
+        if preset is None:
+            await src.docker_backend.stop_container(container, timeout=max(int(self._remaining()), 1))
+            self.timer.mark(f'{container.name} exited')
+            return True
+
+        while self._remaining() > 0:
+            if await src.docker_backend.status(container) != 'running':
+                self.timer.mark(f'{container.name} exited')
+                return True
+
+            await asyncio.sleep(0.5)
+
+        return False
+
+    async def run(self):
+        for session in self.bot.servers:
+            if session.proxy is not None:
+                await session.proxy.close()
+                session.proxy = None
+
+        servers = await self._servers()
+
+        if not servers:
+            return
+
+        self._deadline_at = time.monotonic() + self.deadline
+        presets = [preset for preset, _ in servers if preset is not None]
+
+        with self.timer.measure('save-all'):
+            await self._command_all(presets, 'save-all')
+
+        with self.timer.measure('stop'):
+            await self._command_all(presets, 'stop')
+
+        with self.timer.measure('waiting for exit'):
+            exited = await asyncio.gather(
+                *(self._wait_for_exit(preset, container) for preset, container in servers), return_exceptions=True
+            )
+
+        left = [container for (_, container), done in zip(servers, exited) if done is not True]
+
+        if left:
+            with self.timer.measure('killing'):
+                print(f"❌ {', '.join(x.name for x in left)} didn't stop in {self.deadline:.0f}s, killing.")
+                await asyncio.gather(
+                    *(src.docker_backend.stop_container(x, timeout=0) for x in left), return_exceptions=True
+                )
+
+        with self.timer.measure('cleanup'):
+            await asyncio.gather(*(x.shutdown_logic(0) for x in presets), return_exceptions=True)
+
+        for preset in presets:
+            self.bot.servers.remove(preset.name)
+
+        self.timer.report()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+_STATUS = 1
+_LOGIN = 2
+_TIMEOUT = 5.0
+
+
+def _varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+
+        if not value:
+            out.append(byte)
+            return bytes(out)
+
+        out.append(byte | 0x80)
+
+
+def _unpack_varint(data: bytes, position: int = 0) -> tuple[int, int]:
+    """Value and position after it."""
+    result = 0
+
+    for shift in range(0, 35, 7):
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            return result, position
+
+    raise ValueError('VarInt is too big')
+
+
+def _unpack_string(data: bytes, position: int = 0) -> tuple[str, int]:
+    length, position = _unpack_varint(data, position)
+    return data[position:position + length].decode('utf-8', errors='replace'), position + length
+
+
+def _packet(packet_id: int, data: bytes) -> bytes:
+    body = _varint(packet_id) + data
+    return _varint(len(body)) + body
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    length = 0
+
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            break
+
+    data = await reader.readexactly(length)
+    packet_id, position = _unpack_varint(data)
+
+    return packet_id, data[position:]
+
+
+class SleepProxy:
+    """
+    Stands in for a sleeping server on its port, speaking just enough of the minecraft protocol.
+
+    Server list pings are answered with a "sleeping" MOTD. Players who try to join are told the server
+    is starting, and the first of them triggers `on_wake(player_name)`.
+    """
+
+    def __init__(self, host: str, port: int, motd: str, version: str, on_wake: Callable[[str], Awaitable[None]]):
+        self.host = host
+        self.port = port
+        self.motd = motd
+        self.version = version
+        self.on_wake = on_wake
+
+        self._server: asyncio.AbstractServer | None = None
+        self._woken = False
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(self._serve(reader, writer), timeout=_TIMEOUT)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        packet_id, data = await _read_packet(reader)
+
+        if packet_id != 0x00:
+            return  # Not a handshake.
+
+        # Handshake: protocol version, server address, port (2 bytes), next state.
+        protocol, position = _unpack_varint(data)
+        _, position = _unpack_string(data, position)
+        state, _ = _unpack_varint(data, position + 2)
+
+        if state == _STATUS:
+            await _read_packet(reader)  # Status request, it's empty.
+
+            status = {
+                'version': {'name': self.version, 'protocol': protocol},
+                'players': {'max': 0, 'online': 0},
+                'description': {'text': self.motd},
+            }
+            writer.write(_packet(0x00, self._string(json.dumps(status))))
+            await writer.drain()
+
+            packet_id, data = await _read_packet(reader)
+            if packet_id == 0x01:  # Ping, answered with the same payload.
+                writer.write(_packet(0x01, data))
+                await writer.drain()
+
+        elif state == _LOGIN:
+            _, data = await _read_packet(reader)  # Login start, begins with the player name.
+            player, _ = _unpack_string(data)
+
+            reason = {'text': 'Server is starting, join again in a minute.'}
+            writer.write(_packet(0x00, self._string(json.dumps(reason))))
+            await writer.drain()
+
+            if not self._woken:
+                self._woken = True
+                asyncio.create_task(self.on_wake(player))
+
+    @staticmethod
+    def _string(value: str) -> bytes:
+        data = value.encode('utf-8')
+        return _varint(len(data)) + data
@@ -0,0 +1,41 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable
+
+
+class StartupTimer:
+    """Measures startup (or shutdown) phases, which may overlap, and prints a report once it's done."""
+
+    def __init__(self, title: str = 'Startup timings'):
+        self.title = title
+        self.started = time.perf_counter()
+        self.phases: dict[str, tuple[float, float]] = {}  # name: (start offset, duration)
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (start - self.started, time.perf_counter() - start)
+
+    async def run(self, name: str, awaitable: Awaitable):
+        with self.measure(name):
+            return await awaitable
+
+    def mark(self, name: str):
+        """Record a point in time, as a phase that started with the bot."""
+        self.phases[name] = (0.0, time.perf_counter() - self.started)
+
+    def report(self) -> str:
+        lines = [
+            f'  {name:<20} {offset * 1000:>8.1f} ms +{duration * 1000:>8.1f} ms'
+            for name, (offset, duration) in sorted(self.phases.items(), key=lambda x: x[1][0] + x[1][1])
+        ]
+        report = f'{self.title} (started at, took):\n' + '\n'.join(lines)
+
+        print(f'⏱ {report}')
+        logging.info(report)
+
+        return report
@@ -0,0 +1,236 @@
+import asyncio
+import datetime
+import time
+from array import array
+
+import config
+import src
+from .models import ResourceSample
+
+METRICS = ('cpu', 'memory', 'net_rx', 'net_tx', 'block_read', 'block_write')
+_SPARKS = '▁▂▃▄▅▆▇█'
+
+
+class RingBuffer:
+    """Fixed-size buffer of floats backed by an `array`, no per-sample objects."""
+
+    def __init__(self, size: int):
+        self._data = array('d', bytes(8 * size))
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float):
+        self._data[self._index] = value
+        self._index = (self._index + 1) % len(self._data)
+        self._count = min(self._count + 1, len(self._data))
+
+    def last(self) -> float:
+        return self._data[self._index - 1] if self._count else 0.0
+
+    def values(self) -> list[float]:
+        """Oldest first."""
+        if self._count < len(self._data):
+            return self._data[:self._count].tolist()
+
+        return (self._data[self._index:] + self._data[:self._index]).tolist()
+
+
+class _Rollup:
+    def __init__(self, start: datetime.datetime):
+        self.start = start
+        self.count = 0
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.memory_max = 0.0
+
+    def add(self, values: dict[str, float], weight: int = 1, memory_max: float = None):
+        self.count += weight
+        for metric in METRICS:
+            self.sums[metric] += values[metric] * weight
+
+        self.memory_max = max(self.memory_max, memory_max if memory_max is not None else values['memory'])
+
+    def averages(self) -> dict[str, float]:
+        return {metric: self.sums[metric] / max(self.count, 1) for metric in METRICS}
+
+
+class ContainerSeries:
+    """Recent samples of one preset's container plus the minute/hour rollups in progress."""
+
+    def __init__(self, preset: str):
+        self.preset = preset
+        self.buffers = {metric: RingBuffer(config.STATS_BUFFER_SIZE) for metric in METRICS}
+
+        self._previous: tuple[float, dict] | None = None
+        self.minute_rollup: _Rollup | None = None
+        self.hour_rollup: _Rollup | None = None
+
+    def current(self) -> dict[str, float]:
+        return {metric: self.buffers[metric].last() for metric in METRICS}
+
+    def add(self, stats: dict, now: float) -> dict[str, float] | None:
+        """Turn raw docker stats into a sample. Rates need two samples, so the first one returns None."""
+        cpu_stats = stats.get('cpu_stats') or {}
+        memory_stats = stats.get('memory_stats') or {}
+
+        raw = {
+            'cpu_total': cpu_stats.get('cpu_usage', {}).get('total_usage', 0),
+            'cpu_system': cpu_stats.get('system_cpu_usage', 0),
+            'net_rx': sum(x.get('rx_bytes', 0) for x in (stats.get('networks') or {}).values()),
+            'net_tx': sum(x.get('tx_bytes', 0) for x in (stats.get('networks') or {}).values()),
+            'block_read': 0,
+            'block_write': 0,
+        }
+
+        for entry in (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []:
+            op = entry.get('op', '').lower()
+            if op in ('read', 'write'):
+                raw[f'block_{op}'] += entry.get('value', 0)
+
+        # Page cache isn't really used by the server, docker cli subtracts it the same way.
+        memory_details = memory_stats.get('stats') or {}
+        memory = memory_stats.get('usage', 0) - memory_details.get(
+            'inactive_file', memory_details.get('cache', 0)
+        )
+
+        previous = self._previous
+        self._previous = (now, raw)
+
+        if previous is None:
+            return None
+
+        elapsed = max(now - previous[0], 1e-6)
+        cpu_delta = raw['cpu_total'] - previous[1]['cpu_total']
+        system_delta = raw['cpu_system'] - previous[1]['cpu_system']
+        cpus = cpu_stats.get('online_cpus', 1)
+
+        sample = {
+            'cpu': cpu_delta / system_delta * cpus * 100 if system_delta > 0 else 0.0,
+            'memory': float(max(memory, 0)),
+        }
+
+        for metric in ('net_rx', 'net_tx', 'block_read', 'block_write'):
+            sample[metric] = max(raw[metric] - previous[1][metric], 0) / elapsed
+
+        for metric in METRICS:
+            self.buffers[metric].append(sample[metric])
+
+        return sample
+
+
+class ResourceSampler:
+    """
+    Samples every running server's container every `config.STATS_INTERVAL` seconds.
+
+    All containers are sampled concurrently with non-streaming stats calls, samples go into array-backed
+    ring buffers and only minute/hour averages ever reach the database.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.series: dict[str, ContainerSeries] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+
+            try:
+                await self.sample()
+            except Exception as e:
+                print(f'❌ Resource sampling failed: {e}')
+
+            await asyncio.sleep(max(config.STATS_INTERVAL - (time.monotonic() - started), 0))
+
+    async def sample(self):
+        sessions = [x for x in self.bot.servers if x.container is not None]
+
+        for name in self.series.keys() - {x.name for x in sessions}:
+            await self._flush(self.series.pop(name), final=True)
+
+        results = await asyncio.gather(
+            *(src.docker_backend.stats(x.container) for x in sessions), return_exceptions=True
+        )
+
+        now = time.monotonic()
+        utcnow = datetime.datetime.now(datetime.timezone.utc)
+
+        for session, stats in zip(sessions, results):
+            if isinstance(stats, Exception):
+                print(f"❌ Couldn't sample {session.name}: {stats!r}")
+                continue
+
+            series = self.series.setdefault(session.name, ContainerSeries(session.name))
+            sample = series.add(stats, now)
+
+            if sample is not None:
+                await self._roll_up(series, sample, utcnow)
+
+    async def _roll_up(self, series: ContainerSeries, sample: dict[str, float], now: datetime.datetime):
+        minute = now.replace(second=0, microsecond=0)
+
+        if series.minute_rollup is not None and series.minute_rollup.start != minute:
+            await self._flush(series)
+
+        if series.minute_rollup is None:
+            series.minute_rollup = _Rollup(minute)
+
+        series.minute_rollup.add(sample)
+
+    async def _flush(self, series: ContainerSeries, final: bool = False):
+        rollup = series.minute_rollup
+        series.minute_rollup = None
+
+        if rollup is not None and rollup.count:
+            await self._save(series.preset, 'minute', rollup)
+
+            hour = rollup.start.replace(minute=0)
+
+            if series.hour_rollup is not None and series.hour_rollup.start != hour:
+                await self._save(series.preset, 'hour', series.hour_rollup)
+                series.hour_rollup = None
+
+            if series.hour_rollup is None:
+                series.hour_rollup = _Rollup(hour)
+
+            series.hour_rollup.add(rollup.averages(), rollup.count, rollup.memory_max)
+
+        if final and series.hour_rollup is not None:
+            await self._save(series.preset, 'hour', series.hour_rollup)
+            series.hour_rollup = None
+
+    @staticmethod
+    async def _save(preset: str, resolution: str, rollup: _Rollup):
+        averages = rollup.averages()
+
+        await ResourceSample.create(
+            preset=preset, resolution=resolution, timestamp=rollup.start,
+            cpu=averages['cpu'], memory=int(averages['memory']), memory_max=int(rollup.memory_max),
+            net_rx=averages['net_rx'], net_tx=averages['net_tx'],
+            block_read=averages['block_read'], block_write=averages['block_write']
+        )
+
+        if resolution == 'hour':
+            cutoff = rollup.start - datetime.timedelta(hours=config.STATS_MINUTE_RETENTION)
+            await ResourceSample.filter(preset=preset, resolution='minute', timestamp__lt=cutoff).delete()
+
+
+def sparkline(values: list[float]) -> str:
+    if not values:
+        return ''
+
+    low, high = min(values), max(values)
+    scale = (len(_SPARKS) - 1) / (high - low) if high > low else 0
+
+    return ''.join(_SPARKS[round((x - low) * scale)] for x in values)